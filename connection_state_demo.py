@@ -3,51 +3,85 @@
 Simple demo showing connection state vs connectionless
 """
 
+import functools
+import io
 import socket
+import sys
 import time
 
-print("=== DEMONSTRATING CONNECTION STATE ===\n")
+
+@functools.lru_cache(maxsize=None)
+def resolve_tcp(host, port):
+    """Resolve host:port once to an IPv4 TCP address (no AAAA lookup)"""
+    return socket.getaddrinfo(
+        host,
+        port,
+        socket.AF_INET,
+        socket.SOCK_STREAM,
+        socket.IPPROTO_TCP,
+        socket.AI_NUMERICSERV,
+    )[0]
+
+
+def flush_output(out):
+    """Write a buffered section to stdout in a single call and reset the buffer"""
+    sys.stdout.write(out.getvalue())
+    sys.stdout.flush()
+    out.seek(0)
+    out.truncate()
+
+
+# Output is buffered and written once per section rather than per line
+out = io.StringIO()
+
+print("=== DEMONSTRATING CONNECTION STATE ===\n", file=out)
 
 # 1. Create TCP socket (will establish connection state)
-print("1. Creating TCP connection to google.com...")
-tcp_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-tcp_sock.connect(("google.com", 80))
-print("   ✅ TCP connection established!")
-print("   → Your OS now maintains state for this connection")
-print("   → Google's server also maintains state for this connection")
-print("   → Both sides allocated memory and resources")
+print("1. Creating TCP connection to google.com...", file=out)
+flush_output(out)  # Show progress before the (possibly slow) connect
+family, socktype, proto, _, sockaddr = resolve_tcp("google.com", 80)
+tcp_sock = socket.socket(family, socktype, proto)
+tcp_sock.connect(sockaddr)
+print("   ✅ TCP connection established!", file=out)
+print("   → Your OS now maintains state for this connection", file=out)
+print("   → Google's server also maintains state for this connection", file=out)
+print("   → Both sides allocated memory and resources", file=out)
+
+flush_output(out)
 
 time.sleep(2)
 
 # 2. Create UDP socket (no connection state)
-print("\n2. Creating UDP socket...")
+print("\n2. Creating UDP socket...", file=out)
 udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-print("   ✅ UDP socket created!")
-print("   → No connection established")
-print("   → No state maintained on either side")
-print("   → No resources allocated for 'session'")
+print("   ✅ UDP socket created!", file=out)
+print("   → No connection established", file=out)
+print("   → No state maintained on either side", file=out)
+print("   → No resources allocated for 'session'", file=out)
 
 # 3. Let's see the difference in network tools
-print("\n3. Check network connections now...")
-print("   Run this command: ss -t | grep google")
-print("   You'll see the TCP connection listed")
-print("   UDP connections are NOT listed because there's no 'connection'")
+print("\n3. Check network connections now...", file=out)
+print("   Run this command: ss -t | grep google", file=out)
+print("   You'll see the TCP connection listed", file=out)
+print("   UDP connections are NOT listed because there's no 'connection'", file=out)
 
 tcp_sock.close()
 udp_sock.close()
+flush_output(out)
+
+print("\n=== REAL-WORLD ANALOGY ===", file=out)
+print("TCP = Phone Call:", file=out)
+print("  • You dial, they answer, conversation established", file=out)
+print("  • Both parties 'on the line' throughout", file=out)
+print("  • Resources held (phone line, attention)", file=out)
+print("  • 'Connection' exists until someone hangs up", file=out)
+
+print("\nUDP = Sending Letters:", file=out)
+print("  • You write letter, drop in mailbox", file=out)
+print("  • No 'conversation' established", file=out)
+print("  • No resources held between letters", file=out)
+print("  • Each letter is independent", file=out)
 
-print("\n=== REAL-WORLD ANALOGY ===")
-print("TCP = Phone Call:")
-print("  • You dial, they answer, conversation established")
-print("  • Both parties 'on the line' throughout")
-print("  • Resources held (phone line, attention)")
-print("  • 'Connection' exists until someone hangs up")
-
-print("\nUDP = Sending Letters:")
-print("  • You write letter, drop in mailbox")
-print("  • No 'conversation' established")
-print("  • No resources held between letters")
-print("  • Each letter is independent")
-
-print("\n📬 THE POSTAL SERVICE (physical medium) exists in both cases!")
-print("📞 The difference is whether you establish a 'conversation'")
+print("\n📬 THE POSTAL SERVICE (physical medium) exists in both cases!", file=out)
+print("📞 The difference is whether you establish a 'conversation'", file=out)
+flush_output(out)
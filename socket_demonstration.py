@@ -2,143 +2,343 @@
 """
 Practical demonstration of IP, Ports, and Sockets
 Shows how computers communicate via network endpoints
+
+Run with --uring for the io_uring variant (Linux, requires liburing)
 """
 
+import io
+import os
+import selectors
 import socket
-import threading
-import time
+import struct
+import sys
+
+try:
+    import liburing  # Optional: only needed for the io_uring variant
+except ImportError:
+    liburing = None
+
+SIOCGIFADDR = 0x8915  # Linux ioctl: get an interface's IPv4 address
+SELECT_TIMEOUT = 5.0  # Seconds to wait for the local exchange before giving up
+
+
+def get_local_ip():
+    """Return this machine's first non-loopback IPv4 address"""
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        # Ask the kernel for each interface's address directly; no route
+        # lookup and no network reachability needed
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+            for _, ifname in socket.if_nameindex():
+                if ifname == "lo":
+                    continue
+                try:
+                    ifreq = fcntl.ioctl(
+                        probe.fileno(),
+                        SIOCGIFADDR,
+                        struct.pack("256s", ifname.encode()[:15]),
+                    )
+                except OSError:
+                    continue  # Interface has no IPv4 address
+                return socket.inet_ntoa(ifreq[20:24])
+
+        # Offline (only loopback is up): the demo still works over loopback
+        return "127.0.0.1"
+
+    # Elsewhere, let the routing table pick the outgoing interface
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as temp_socket:
+        temp_socket.connect(("8.8.8.8", 80))
+        return temp_socket.getsockname()[0]
+
+
+def flush_output(out):
+    """Write a buffered section to stdout in a single call and reset the buffer"""
+    sys.stdout.write(out.getvalue())
+    sys.stdout.flush()
+    out.seek(0)
+    out.truncate()
 
 
 def demonstrate_socket_basics():
     """Show the fundamental concepts with real examples"""
 
-    print("=" * 60)
-    print("FUNDAMENTAL NETWORKING CONCEPTS DEMONSTRATION")
-    print("=" * 60)
+    # Output is buffered and written once per section rather than per line
+    out = io.StringIO()
+
+    print("=" * 60, file=out)
+    print("FUNDAMENTAL NETWORKING CONCEPTS DEMONSTRATION", file=out)
+    print("=" * 60, file=out)
 
     # 1. Show current machine's network identity
-    print("\n1. YOUR COMPUTER'S NETWORK IDENTITY:")
-    print("-" * 40)
+    print("\n1. YOUR COMPUTER'S NETWORK IDENTITY:", file=out)
+    print("-" * 40, file=out)
 
     # Get local IP
-    temp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    temp_socket.connect(("8.8.8.8", 80))
-    local_ip = temp_socket.getsockname()[0]
-    temp_socket.close()
+    local_ip = get_local_ip()
 
-    print(f"   Local IP Address: {local_ip}")
-    print(f"   Loopback Address: 127.0.0.1")
-    print(f"   Machine Hostname: {socket.gethostname()}")
+    print(f"   Local IP Address: {local_ip}", file=out)
+    print(f"   Loopback Address: 127.0.0.1", file=out)
+    print(f"   Machine Hostname: {socket.gethostname()}", file=out)
+
+    flush_output(out)
 
     # 2. Demonstrate port concepts
-    print("\n2. HOW PORTS WORK:")
-    print("-" * 40)
-    print("   Ports are like 'apartment numbers' for your IP address")
-    print("   Your computer can have 65,535 different ports (0-65535)")
-    print("   Multiple applications can use network simultaneously")
+    print("\n2. HOW PORTS WORK:", file=out)
+    print("-" * 40, file=out)
+    print("   Ports are like 'apartment numbers' for your IP address", file=out)
+    print("   Your computer can have 65,535 different ports (0-65535)", file=out)
+    print("   Multiple applications can use network simultaneously", file=out)
+
+    flush_output(out)
 
     # 3. Create a simple server to show port binding
-    print("\n3. CREATING A SERVER SOCKET:")
-    print("-" * 40)
+    print("\n3. CREATING A SERVER SOCKET:", file=out)
+    print("-" * 40, file=out)
 
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Send small messages immediately instead of waiting to coalesce (Nagle)
+    server_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # No SO_REUSEPORT: a stale instance still holding the port must make bind()
+    # fail loudly, not silently take this demo's connection
 
     # Bind to a specific port
     server_port = 8888
     server_socket.bind((local_ip, server_port))
     server_socket.listen(1)
+    server_socket.setblocking(False)
 
-    print(f"   ✅ Server created and bound to: {local_ip}:{server_port}")
-    print(f"   📍 Full socket address: {local_ip}:{server_port}")
-    print(f"   🎯 Other computers can connect to this socket")
-
-    # 4. Show what happens when client connects
-    print("\n4. DEMONSTRATING CLIENT-SERVER CONNECTION:")
-    print("-" * 40)
-
-    def simple_server():
-        """Simple server that accepts one connection"""
-        try:
-            print("   🔄 Server waiting for connection...")
-            client_conn, client_address = server_socket.accept()
-            print(f"   ✅ Connection received from: {client_address}")
-
-            # Show the socket pair
-            local_endpoint = client_conn.getsockname()
-            remote_endpoint = client_conn.getpeername()
-
-            print(f"   📡 Socket Pair Created:")
-            print(f"      Server Socket: {local_endpoint[0]}:{local_endpoint[1]}")
-            print(f"      Client Socket: {remote_endpoint[0]}:{remote_endpoint[1]}")
-
-            # Receive and respond to data
-            data = client_conn.recv(1024).decode()
-            print(f"   📨 Received: {data}")
-
-            response = f"Hello from server! You connected from {remote_endpoint}"
-            client_conn.send(response.encode())
-            print(f"   📤 Sent: {response}")
-
-            client_conn.close()
-
-        except Exception as e:
-            print(f"   ❌ Server error: {e}")
+    print(f"   ✅ Server created and bound to: {local_ip}:{server_port}", file=out)
+    print(f"   📍 Full socket address: {local_ip}:{server_port}", file=out)
+    print(f"   🎯 Other computers can connect to this socket", file=out)
 
-    # Start server in background
-    server_thread = threading.Thread(target=simple_server)
-    server_thread.start()
+    flush_output(out)
 
-    # Give server time to start
-    time.sleep(0.5)
+    # 4. Show what happens when client connects
+    print("\n4. DEMONSTRATING CLIENT-SERVER CONNECTION:", file=out)
+    print("-" * 40, file=out)
+    print("   🔄 Server waiting for connection...", file=out)
 
     # 5. Create client connection
-    print("\n   🔌 Creating client connection...")
+    print("\n   🔌 Creating client connection...", file=out)
 
+    # Non-blocking connect returns immediately (EINPROGRESS); the selector
+    # reports the socket writable once the handshake has completed
     client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    client_socket.connect((local_ip, server_port))
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    client_socket.setblocking(False)
+    client_socket.connect_ex((local_ip, server_port))
+
+    # One selector drives both ends of the connection on this thread
+    selector = selectors.DefaultSelector()
+    selector.register(server_socket, selectors.EVENT_READ)
+    selector.register(client_socket, selectors.EVENT_WRITE)
+
+    message = b"Hello from client!"
+    # One receive buffer, allocated up front and reused by both ends
+    buffer = bytearray(4096)
+    buffer_view = memoryview(buffer)
+    client_conn = None
+    response = None
+
+    while response is None:
+        ready = selector.select(timeout=SELECT_TIMEOUT)
+        if not ready:
+            raise TimeoutError(
+                f"No socket activity within {SELECT_TIMEOUT}s on port {server_port}"
+            )
+        for key, events in ready:
+            sock = key.fileobj
+
+            if sock is server_socket:
+                # Listening socket is readable: a connection is waiting
+                client_conn, client_address = server_socket.accept()
+                client_conn.setblocking(False)
+                client_conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                if hasattr(socket, "TCP_QUICKACK"):  # Linux only
+                    client_conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1)
+                print(f"   ✅ Connection received from: {client_address}", file=out)
+
+                # Show the socket pair
+                local_endpoint = client_conn.getsockname()
+                remote_endpoint = client_conn.getpeername()
+
+                print(f"   📡 Socket Pair Created:", file=out)
+                print(
+                    f"      Server Socket: {local_endpoint[0]}:{local_endpoint[1]}",
+                    file=out,
+                )
+                print(
+                    f"      Client Socket: {remote_endpoint[0]}:{remote_endpoint[1]}",
+                    file=out,
+                )
+
+                selector.unregister(server_socket)
+                selector.register(client_conn, selectors.EVENT_READ)
+
+            elif sock is client_conn:
+                # Receive and respond to data
+                nbytes = client_conn.recv_into(buffer_view)
+                data = str(buffer_view[:nbytes], "utf-8")
+                print(f"   📨 Received: {data}", file=out)
+
+                reply = f"Hello from server! You connected from {remote_endpoint}"
+                client_conn.sendall(reply.encode())
+                print(f"   📤 Sent: {reply}", file=out)
+
+                selector.unregister(client_conn)
+                client_conn.close()
+
+            elif events & selectors.EVENT_WRITE:
+                # Client socket is writable: the connection is established
+                error = client_socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error:
+                    raise OSError(error, os.strerror(error))
+
+                # Show client's socket information
+                client_local = client_socket.getsockname()
+                client_remote = client_socket.getpeername()
+
+                print(
+                    f"   📍 Client's local socket: {client_local[0]}:{client_local[1]}",
+                    file=out,
+                )
+                print(
+                    f"   🎯 Client connecting to: {client_remote[0]}:{client_remote[1]}",
+                    file=out,
+                )
+
+                # Send data, then wait for the response
+                client_socket.sendall(message)
+                selector.modify(client_socket, selectors.EVENT_READ)
+
+            else:
+                # Receive response
+                nbytes = client_socket.recv_into(buffer_view)
+                response = str(buffer_view[:nbytes], "utf-8")
+                print(f"   📨 Client received: {response}", file=out)
+
+    selector.close()
+    client_socket.close()
+    server_socket.close()
 
-    # Show client's socket information
-    client_local = client_socket.getsockname()
-    client_remote = client_socket.getpeername()
+    flush_output(out)
 
-    print(f"   📍 Client's local socket: {client_local[0]}:{client_local[1]}")
-    print(f"   🎯 Client connecting to: {client_remote[0]}:{client_remote[1]}")
+    # 6. Explain what just happened
+    print("\n5. WHAT JUST HAPPENED STEP-BY-STEP:", file=out)
+    print("-" * 40, file=out)
+    print("   1. Server bound to IP:Port (claimed that address)", file=out)
+    print("   2. Operating System updated its port table", file=out)
+    print("   3. Client connected using its own temporary port", file=out)
+    print("   4. OS created a socket pair (connection endpoints)", file=out)
+    print("   5. Data flowed between the two sockets", file=out)
+    print("   6. Connection closed, ports released", file=out)
+
+    print("\n6. KEY CONCEPTS SUMMARY:", file=out)
+    print("-" * 40, file=out)
+    print("   🏠 IP Address = Street address (which computer)", file=out)
+    print("   🚪 Port = Apartment number (which application)", file=out)
+    print("   🔌 Socket = Complete address (IP:Port + protocol)", file=out)
+    print("   📬 OS = Mail service (delivers packets to right app)", file=out)
+    print("   ✅ ALL network communication uses IP + Port combination", file=out)
+
+    print("\n" + "=" * 60, file=out)
+    print("DEMONSTRATION COMPLETE!", file=out)
+    print("=" * 60, file=out)
+    flush_output(out)
+
+
+def demonstrate_socket_basics_uring():
+    """Same server exchange driven by io_uring (Linux, needs liburing)"""
+    if liburing is None:
+        print("io_uring variant needs the liburing package: pip install liburing")
+        return
+
+    out = io.StringIO()
+
+    print("=" * 60, file=out)
+    print("SERVER SOCKET WITH IO_URING (COMPLETION-BASED I/O)", file=out)
+    print("=" * 60, file=out)
+
+    local_ip = get_local_ip()
+    server_port = 8888
 
-    # Send data
-    message = "Hello from client!"
-    client_socket.send(message.encode())
+    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    server_socket.bind((local_ip, server_port))
+    server_socket.listen(1)
+    print(f"   ✅ Server bound to: {local_ip}:{server_port}", file=out)
 
-    # Receive response
-    response = client_socket.recv(1024).decode()
-    print(f"   📨 Client received: {response}")
+    # The kernel completes the handshake from the listen backlog, so the
+    # client can connect and send before the server has called accept
+    client_socket = socket.create_connection((local_ip, server_port))
+    client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    client_socket.send(b"Hello from client!")
+    client_local = client_socket.getsockname()
+    print(
+        f"   🔌 Client connected from: {client_local[0]}:{client_local[1]}",
+        file=out,
+    )
+
+    ring = liburing.Ring()
+    cqe = liburing.Cqe()
+    liburing.io_uring_queue_init(8, ring)
+    try:
+        # One fixed-file slot: accept installs the new connection there and
+        # the linked recv/send refer to it by index instead of by fd
+        liburing.io_uring_register_files_sparse(ring, 1)
+
+        buffer = bytearray(1024)
+        reply = b"Hello from server!"
+
+        # accept -> recv -> send, linked so each starts when the previous
+        # completes
+        sqe = liburing.io_uring_get_sqe(ring)
+        liburing.io_uring_prep_accept_direct(sqe, server_socket.fileno(), None, 0)
+        sqe.flags |= liburing.IOSQE_IO_LINK
+        sqe.user_data = 1
+
+        sqe = liburing.io_uring_get_sqe(ring)
+        liburing.io_uring_prep_recv(sqe, 0, buffer)
+        sqe.flags |= liburing.IOSQE_FIXED_FILE | liburing.IOSQE_IO_LINK
+        sqe.user_data = 2
+
+        sqe = liburing.io_uring_get_sqe(ring)
+        liburing.io_uring_prep_send(sqe, 0, reply)
+        sqe.flags |= liburing.IOSQE_FIXED_FILE
+        sqe.user_data = 3
+
+        # A single system call submits all three operations and waits for them
+        liburing.io_uring_submit_and_wait(ring, 3)
+        print("   📡 Submitted accept + recv + send in ONE system call", file=out)
+
+        results = {}
+        for _ in range(3):
+            liburing.io_uring_wait_cqe(ring, cqe)
+            entry = cqe[0]
+            results[entry.user_data] = entry.res
+            liburing.io_uring_cqe_seen(ring, entry)
+    finally:
+        liburing.io_uring_queue_exit(ring)
+
+    print(f"   📨 Server received: {buffer[: results[2]].decode()}", file=out)
+    print(f"   📤 Server sent: {reply[: results[3]].decode()}", file=out)
+    print(f"   📨 Client received: {client_socket.recv(1024).decode()}", file=out)
 
     client_socket.close()
-    server_thread.join()
     server_socket.close()
 
-    # 6. Explain what just happened
-    print("\n5. WHAT JUST HAPPENED STEP-BY-STEP:")
-    print("-" * 40)
-    print("   1. Server bound to IP:Port (claimed that address)")
-    print("   2. Operating System updated its port table")
-    print("   3. Client connected using its own temporary port")
-    print("   4. OS created a socket pair (connection endpoints)")
-    print("   5. Data flowed between the two sockets")
-    print("   6. Connection closed, ports released")
-
-    print("\n6. KEY CONCEPTS SUMMARY:")
-    print("-" * 40)
-    print("   🏠 IP Address = Street address (which computer)")
-    print("   🚪 Port = Apartment number (which application)")
-    print("   🔌 Socket = Complete address (IP:Port + protocol)")
-    print("   📬 OS = Mail service (delivers packets to right app)")
-    print("   ✅ ALL network communication uses IP + Port combination")
-
-    print("\n" + "=" * 60)
-    print("DEMONSTRATION COMPLETE!")
-    print("=" * 60)
+    print(
+        "\n   Blocking sockets: accept, recv and send are one system call each",
+        file=out,
+    )
+    print("   io_uring: queue the requests, let the kernel complete them", file=out)
+    flush_output(out)
 
 
 if __name__ == "__main__":
-    demonstrate_socket_basics()
+    if "--uring" in sys.argv[1:]:
+        demonstrate_socket_basics_uring()
+    else:
+        demonstrate_socket_basics()
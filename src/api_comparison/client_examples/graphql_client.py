@@ -3,11 +3,55 @@ GraphQL API Client Examples
 Demonstrates efficiency and flexibility of GraphQL
 """
 
+import hashlib
+import orjson
 import requests
-import json
-from typing import Dict, Any
-
-BASE_URL = "http://localhost:8001/graphql"
+import sys
+import os
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, Tuple
+
+# Add parent directory to path to import shared modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shared.queries import (
+    AUTHOR_BOOKS_QUERY,
+    CUSTOMER_ORDERS_QUERY,
+    FLEXIBLE_BOOKS_QUERY,
+    SEARCH_BOOKS_QUERY,
+)
+
+# IP literal rather than "localhost" so new connections skip name resolution
+BASE_URL = "http://127.0.0.1:8001/graphql"
+
+
+def _payload_templates(query: str) -> Tuple[bytes, bytes]:
+    """Serialize a query once into (hash-only, full) bodies with a %s variables slot
+
+    The hash-only body is an Apollo automatic persisted query: the server
+    looks the text up by its sha256, so hot queries upload ~100 bytes instead
+    of the whole document.
+    """
+    query_hash = hashlib.sha256(query.encode()).hexdigest()
+    persisted_query = {"version": 1, "sha256Hash": query_hash}
+    extensions = orjson.dumps({"persistedQuery": persisted_query})
+    hashed = b'{"extensions":' + extensions + b',"variables":%s}'
+    full = (
+        b'{"query":'
+        + orjson.dumps(query).replace(b"%", b"%%")
+        + b',"extensions":'
+        + extensions
+        + b',"variables":%s}'
+    )
+    return hashed, full
+
+
+# Pre-serialized request bodies: the query text never changes, so only the
+# (small) variables object is encoded per call
+_AUTHOR_BOOKS_PAYLOADS = _payload_templates(AUTHOR_BOOKS_QUERY)
+_CUSTOMER_ORDERS_PAYLOADS = _payload_templates(CUSTOMER_ORDERS_QUERY)
+_SEARCH_BOOKS_PAYLOADS = _payload_templates(SEARCH_BOOKS_QUERY)
+_FLEXIBLE_BOOKS_PAYLOADS = _payload_templates(FLEXIBLE_BOOKS_QUERY)
 
 
 class GraphQLBookstoreClient:
@@ -16,6 +60,11 @@ class GraphQLBookstoreClient:
         self.session = requests.Session()
         self.session.headers.update({"Content-Type": "application/json"})
 
+        # Keep connections alive across calls instead of reconnecting
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
     def execute_query(
         self, query: str, variables: Dict[str, Any] = None
     ) -> Dict[str, Any]:
@@ -24,9 +73,42 @@ class GraphQLBookstoreClient:
         if variables:
             payload["variables"] = variables
 
-        response = self.session.post(self.base_url, json=payload)
+        response = self.session.post(self.base_url, data=orjson.dumps(payload))
         response.raise_for_status()
-        return response.json()
+        return orjson.loads(response.content)
+
+    def _post(
+        self, payloads: Tuple[bytes, bytes], variables: bytes = b"null"
+    ) -> Tuple[Dict[str, Any], int, int]:
+        """POST a persisted query; return (JSON, requests made, bytes received)"""
+        hashed, full = payloads
+        response = self.session.post(self.base_url, data=hashed % variables)
+        if response.status_code == 400 and response.text == "PersistedQueryNotFound":
+            # First use of this query on the server: send the text once so
+            # it is registered, later calls go by hash only. The miss is a
+            # real round trip, so it is counted too.
+            print("Query not registered on the server yet: resending its text")
+            missed_bytes = len(response.content)
+            response = self.session.post(self.base_url, data=full % variables)
+            content = response.content
+            return orjson.loads(content), 2, missed_bytes + len(content)
+        content = response.content
+        return orjson.loads(content), 1, len(content)
+
+    def _execute_once(
+        self, payloads: Tuple[bytes, bytes], variables: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Send one query and annotate the result with request/byte totals"""
+        print(f"Making ONE request: POST {self.base_url}")
+        result, total_requests, total_bytes = self._post(
+            payloads, orjson.dumps(variables)
+        )
+        result["total_requests"] = total_requests
+        result["total_bytes"] = total_bytes
+
+        print(f"Total requests made: {result['total_requests']}")
+        print(f"Total bytes received: {result['total_bytes']}")
+        return result
 
     def get_author_with_books(self, author_id: int) -> Dict[str, Any]:
         """
@@ -35,36 +117,7 @@ class GraphQLBookstoreClient:
         """
         print(f"\n=== GraphQL: Getting author {author_id} with books ===")
 
-        query = """
-        query GetAuthorWithBooks($authorId: Int!) {
-            author(id: $authorId) {
-                id
-                name
-                email
-                bio
-                books {
-                    id
-                    title
-                    price
-                    genre
-                    publicationDate
-                }
-            }
-        }
-        """
-
-        print(f"Making ONE request: POST {self.base_url}")
-        response = self.session.post(
-            self.base_url, json={"query": query, "variables": {"authorId": author_id}}
-        )
-
-        result = response.json()
-        result["total_requests"] = 1
-        result["total_bytes"] = len(response.content)
-
-        print(f"Total requests made: {result['total_requests']}")
-        print(f"Total bytes received: {result['total_bytes']}")
-        return result
+        return self._execute_once(_AUTHOR_BOOKS_PAYLOADS, {"authorId": author_id})
 
     def get_customer_order_summary(self, customer_id: int) -> Dict[str, Any]:
         """
@@ -73,45 +126,10 @@ class GraphQLBookstoreClient:
         """
         print(f"\n=== GraphQL: Getting customer {customer_id} order summary ===")
 
-        query = """
-        query GetCustomerOrderSummary($customerId: Int!) {
-            customer(id: $customerId) {
-                id
-                name
-                email
-                orders {
-                    id
-                    orderDate
-                    totalAmount
-                    status
-                    items {
-                        quantity
-                        price
-                        book {
-                            id
-                            title
-                            price
-                        }
-                    }
-                }
-            }
-        }
-        """
-
-        print(f"Making ONE request: POST {self.base_url}")
-        response = self.session.post(
-            self.base_url,
-            json={"query": query, "variables": {"customerId": customer_id}},
+        return self._execute_once(
+            _CUSTOMER_ORDERS_PAYLOADS, {"customerId": customer_id}
         )
 
-        result = response.json()
-        result["total_requests"] = 1
-        result["total_bytes"] = len(response.content)
-
-        print(f"Total requests made: {result['total_requests']}")
-        print(f"Total bytes received: {result['total_bytes']}")
-        return result
-
     def search_books_with_authors(self, query_text: str) -> Dict[str, Any]:
         """
         Search books and get ONLY the fields we need
@@ -119,33 +137,12 @@ class GraphQLBookstoreClient:
         """
         print(f"\n=== GraphQL: Searching books for '{query_text}' ===")
 
-        query = """
-        query SearchBooksWithAuthors($searchQuery: String!) {
-            searchBooks(query: $searchQuery, limit: 10) {
-                title
-                price
-                author {
-                    name
-                }
-            }
-        }
-        """
-
-        print(f"Making ONE request: POST {self.base_url}")
-        response = self.session.post(
-            self.base_url,
-            json={"query": query, "variables": {"searchQuery": query_text}},
+        result = self._execute_once(
+            _SEARCH_BOOKS_PAYLOADS, {"searchQuery": query_text}
         )
-
-        result = response.json()
-        result["total_requests"] = 1
-        result["total_bytes"] = len(response.content)
         result["note"] = (
             "Received ONLY the fields requested: title, price, and author name"
         )
-
-        print(f"Total requests made: {result['total_requests']}")
-        print(f"Total bytes received: {result['total_bytes']}")
         return result
 
     def get_flexible_book_data(self) -> Dict[str, Any]:
@@ -154,49 +151,19 @@ class GraphQLBookstoreClient:
         """
         print(f"\n=== GraphQL: Flexible data fetching ===")
 
-        # Mobile app query - minimal data for performance
-        mobile_query = """
-        query MobileBookList {
-            books(limit: 5) {
-                id
-                title
-                price
-            }
-        }
-        """
-
-        # Desktop app query - rich data for detailed display
-        desktop_query = """
-        query DesktopBookList {
-            books(limit: 5) {
-                id
-                title
-                price
-                genre
-                description
-                publicationDate
-                author {
-                    name
-                    bio
-                }
-            }
-        }
-        """
-
-        print("Mobile query - fetching minimal data...")
-        mobile_response = self.session.post(self.base_url, json={"query": mobile_query})
-
-        print("Desktop query - fetching rich data...")
-        desktop_response = self.session.post(
-            self.base_url, json={"query": desktop_query}
-        )
+        # Mobile app view (minimal data) and desktop app view (rich data)
+        print("Fetching mobile and desktop views in ONE request...")
+        result, total_requests, total_bytes = self._post(_FLEXIBLE_BOOKS_PAYLOADS)
+        data = result["data"]
 
+        # Per-view sizes are estimated from each aliased field's serialized JSON
         return {
-            "mobile_data": mobile_response.json(),
-            "desktop_data": desktop_response.json(),
-            "mobile_bytes": len(mobile_response.content),
-            "desktop_bytes": len(desktop_response.content),
-            "total_requests": 2,
+            "mobile_data": data["mobile"],
+            "desktop_data": data["desktop"],
+            "mobile_bytes": len(orjson.dumps(data["mobile"])),
+            "desktop_bytes": len(orjson.dumps(data["desktop"])),
+            "total_requests": total_requests,
+            "total_bytes": total_bytes,
             "note": "Same API, different data based on client needs",
         }
 
@@ -246,8 +213,7 @@ def demo_graphql_advantages():
             author_result["total_bytes"]
             + customer_result["total_bytes"]
             + search_result["total_bytes"]
-            + flexible_result["mobile_bytes"]
-            + flexible_result["desktop_bytes"]
+            + flexible_result["total_bytes"]
         )
 
         print(f"\n=== GraphQL API SUMMARY ===")
@@ -256,7 +222,7 @@ def demo_graphql_advantages():
         print(f"Average bytes per request: {total_bytes / total_requests:.1f}")
 
     except requests.exceptions.ConnectionError:
-        print("Error: Could not connect to GraphQL API at http://localhost:8001")
+        print("Error: Could not connect to GraphQL API at http://127.0.0.1:8001")
         print("Please make sure the GraphQL API server is running:")
         print("cd graphql_api && python app.py")
     except Exception as e:
@@ -3,17 +3,109 @@ REST API Client Examples
 Demonstrates common patterns and problems with REST APIs
 """
 
+import atexit
+import orjson
 import requests
-import json
-from typing import Dict, Any, List
-
-BASE_URL = "http://localhost:8000"
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, Any, List, Tuple
+
+# IP literal rather than "localhost" so new connections skip name resolution
+BASE_URL = "http://127.0.0.1:8000/api"
+
+# Number of URLs whose last response is kept for conditional GETs
+ETAG_CACHE_SIZE = 256
+
+# One session and one thread pool per process, so every client instance
+# shares its pooled keep-alive connections and worker threads instead of
+# opening (and leaking) its own
+_SESSION = None
+_EXECUTOR = None
+_SHARED_LOCK = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    """Return the shared session, creating it on first use"""
+    global _SESSION
+    with _SHARED_LOCK:
+        if _SESSION is None:
+            session = requests.Session()
+            session.headers.update({"Keep-Alive": "timeout=30, max=1000"})
+
+            # Pool enough keep-alive connections for the concurrent requests
+            # below and retry transient gateway errors with a short backoff
+            adapter = HTTPAdapter(
+                pool_connections=32,
+                pool_maxsize=64,
+                max_retries=Retry(
+                    total=3, backoff_factor=0.1, status_forcelist=[502, 503, 504]
+                ),
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+            atexit.register(session.close)
+            _SESSION = session
+    return _SESSION
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the shared thread pool, creating it on first use
+
+    concurrent.futures joins its idle worker threads at interpreter exit.
+    """
+    global _EXECUTOR
+    with _SHARED_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(max_workers=16)
+    return _EXECUTOR
 
 
 class RESTBookstoreClient:
     def __init__(self, base_url: str = BASE_URL):
         self.base_url = base_url
-        self.session = requests.Session()
+        self.session = _get_session()
+
+        # Used to issue requests that don't depend on each other concurrently
+        self.executor = _get_executor()
+
+        # url -> (etag, parsed JSON), most recently used last. _fetch runs on
+        # executor threads, so every access holds the lock.
+        self._etag_cache = OrderedDict()
+        self._etag_lock = threading.Lock()
+
+    def _fetch(self, url: str) -> Tuple[Any, int]:
+        """
+        GET a URL and return (parsed JSON, response size in bytes)
+        Revalidates previously seen URLs with If-None-Match so unchanged
+        resources come back as an empty 304
+        """
+        print(f"Making request: GET {url}")
+        with self._etag_lock:
+            cached = self._etag_cache.get(url)
+        headers = {"If-None-Match": cached[0]} if cached else None
+        response = self.session.get(url, headers=headers)
+        content = response.content
+
+        # 304 Not Modified: the body is empty and our cached copy is current
+        if cached and response.status_code == 304:
+            with self._etag_lock:
+                if url in self._etag_cache:
+                    self._etag_cache.move_to_end(url)
+            return cached[1], len(content)
+
+        data = orjson.loads(content)
+        etag = response.headers.get("ETag")
+        if etag:
+            with self._etag_lock:
+                self._etag_cache[url] = (etag, data)
+                self._etag_cache.move_to_end(url)
+                if len(self._etag_cache) > ETAG_CACHE_SIZE:
+                    self._etag_cache.popitem(last=False)
+        return data, len(content)
 
     def get_author_with_books(self, author_id: int) -> Dict[str, Any]:
         """
@@ -23,23 +115,25 @@ class RESTBookstoreClient:
         print(f"\n=== REST: Getting author {author_id} with books ===")
 
         # Request 1: Get author details
-        print(f"Making request: GET {self.base_url}/authors/{author_id}")
-        author_response = self.session.get(f"{self.base_url}/authors/{author_id}")
-        author_data = author_response.json()
-
-        # Request 2: Get all books by this author
-        print(f"Making request: GET {self.base_url}/books?author_id={author_id}")
-        books_response = self.session.get(
-            f"{self.base_url}/books?author_id={author_id}"
+        author_future = self.executor.submit(
+            self._fetch, f"{self.base_url}/authors/{author_id}"
         )
-        books_data = books_response.json()
+
+        # Request 2: Get all books by this author (sent while request 1 is
+        # still in flight, since neither depends on the other)
+        books_future = self.executor.submit(
+            self._fetch, f"{self.base_url}/authors/{author_id}/books"
+        )
+
+        author_data, author_bytes = author_future.result()
+        books_data, books_bytes = books_future.result()
 
         # Combine the data
         result = {
             "author": author_data,
             "books": books_data,
             "total_requests": 2,
-            "total_bytes": len(author_response.content) + len(books_response.content),
+            "total_bytes": author_bytes + books_bytes,
         }
 
         print(f"Total requests made: {result['total_requests']}")
@@ -49,53 +143,50 @@ class RESTBookstoreClient:
     def get_customer_order_summary(self, customer_id: int) -> Dict[str, Any]:
         """
         Get customer with their recent orders and book details
-        Demonstrates N+1 query problem and over-fetching
+        Avoids N+1 requests with a bulk endpoint, but still needs one request
+        per level of nesting and over-fetches
         """
         print(f"\n=== REST: Getting customer {customer_id} order summary ===")
         request_count = 0
         total_bytes = 0
 
-        # Request 1: Get customer details
-        print(f"Making request: GET {self.base_url}/customers/{customer_id}")
-        customer_response = self.session.get(f"{self.base_url}/customers/{customer_id}")
-        customer_data = customer_response.json()
+        # Requests 1 and 2: Get customer details and the customer's orders.
+        # They are independent, so both are sent at once.
+        customer_future = self.executor.submit(
+            self._fetch, f"{self.base_url}/customers/{customer_id}"
+        )
+        orders_future = self.executor.submit(
+            self._fetch, f"{self.base_url}/customers/{customer_id}/orders"
+        )
+
+        customer_data, nbytes = customer_future.result()
         request_count += 1
-        total_bytes += len(customer_response.content)
+        total_bytes += nbytes
 
-        # Request 2: Get customer's orders
-        print(f"Making request: GET {self.base_url}/orders?customer_id={customer_id}")
-        orders_response = self.session.get(
-            f"{self.base_url}/orders?customer_id={customer_id}"
-        )
-        orders_data = orders_response.json()
+        orders_data, nbytes = orders_future.result()
         request_count += 1
-        total_bytes += len(orders_response.content)
+        total_bytes += nbytes
+
+        # Instead of one request per item (the N+1 problem), collect every
+        # book id and fetch them all with one bulk request
+        book_ids = {book_id for order in orders_data for book_id in order["book_ids"]}
+        book_by_id = {}
+        if book_ids:
+            books_data, nbytes = self._fetch(
+                f"{self.base_url}/books?ids={','.join(map(str, sorted(book_ids)))}"
+            )
+            request_count += 1
+            total_bytes += nbytes
+            book_by_id = {book["id"]: book for book in books_data}
 
-        # For each order, we need to get book details for each item (N+1 problem)
-        enriched_orders = []
+        # Enrich the parsed orders in place. They may be the ETag cache's
+        # copy, which is harmless: each call just re-sets the same "books" key.
         for order in orders_data:
-            enriched_order = order.copy()
-            enriched_items = []
-
-            for item in order["items"]:
-                # Request N: Get book details for each item
-                book_id = item["book_id"]
-                print(f"Making request: GET {self.base_url}/books/{book_id}")
-                book_response = self.session.get(f"{self.base_url}/books/{book_id}")
-                book_data = book_response.json()
-                request_count += 1
-                total_bytes += len(book_response.content)
-
-                enriched_item = item.copy()
-                enriched_item["book"] = book_data
-                enriched_items.append(enriched_item)
-
-            enriched_order["items"] = enriched_items
-            enriched_orders.append(enriched_order)
+            order["books"] = [book_by_id.get(book_id) for book_id in order["book_ids"]]
 
         result = {
             "customer": customer_data,
-            "orders": enriched_orders,
+            "orders": orders_data,
             "total_requests": request_count,
             "total_bytes": total_bytes,
         }
@@ -107,38 +198,43 @@ class RESTBookstoreClient:
     def search_books_with_authors(self, query: str) -> Dict[str, Any]:
         """
         Search books and include author information
-        Demonstrates over-fetching of unnecessary data
+        Asks for only the fields it uses (?fields=), but still needs a second
+        request for the authors
         """
         print(f"\n=== REST: Searching books for '{query}' with authors ===")
         request_count = 0
         total_bytes = 0
 
-        # Request 1: Search books (returns all book fields)
-        print(f"Making request: GET {self.base_url}/books?search={query}")
-        books_response = self.session.get(f"{self.base_url}/books?search={query}")
-        books_data = books_response.json()
+        # Request 1: Search books, projected to the fields we display
+        books_data, nbytes = self._fetch(
+            f"{self.base_url}/books?search={query}&fields=title,price,author_id"
+        )
         request_count += 1
-        total_bytes += len(books_response.content)
+        total_bytes += nbytes
+
+        # Request 2: Get the authors of all matching books in one bulk request
+        author_ids = {book["author_id"] for book in books_data}
+        author_by_id = {}
+        if author_ids:
+            ids = ",".join(map(str, sorted(author_ids)))
+            authors_data, nbytes = self._fetch(
+                f"{self.base_url}/authors?ids={ids}&fields=id,name"
+            )
+            request_count += 1
+            total_bytes += nbytes
+            author_by_id = {author["id"]: author for author in authors_data}
 
-        # Request N: Get author for each book
         enriched_books = []
         for book in books_data:
-            author_id = book["author_id"]
-            print(f"Making request: GET {self.base_url}/authors/{author_id}")
-            author_response = self.session.get(f"{self.base_url}/authors/{author_id}")
-            author_data = author_response.json()
-            request_count += 1
-            total_bytes += len(author_response.content)
-
             enriched_book = book.copy()
-            enriched_book["author"] = author_data
+            enriched_book["author"] = author_by_id.get(book["author_id"])
             enriched_books.append(enriched_book)
 
         result = {
             "books": enriched_books,
             "total_requests": request_count,
             "total_bytes": total_bytes,
-            "note": "Received all book and author fields, even though we only needed title, price, and author name",
+            "note": "?fields= trims the payload, but authors still need a second request",
         }
 
         print(f"Total requests made: {result['total_requests']}")
@@ -156,7 +252,7 @@ def demo_rest_problems():
         print(f"\nAuthor: {author_result['author']['name']}")
         print(f"Books: {len(author_result['books'])} books found")
 
-        # Demo 2: Customer order summary (N+1 problem)
+        # Demo 2: Customer order summary (bulk endpoint, one request per level)
         customer_result = client.get_customer_order_summary(1)
         print(f"\nCustomer: {customer_result['customer']['name']}")
         print(f"Orders: {len(customer_result['orders'])} orders found")
@@ -183,7 +279,7 @@ def demo_rest_problems():
         print(f"Average bytes per request: {total_bytes / total_requests:.1f}")
 
     except requests.exceptions.ConnectionError:
-        print("Error: Could not connect to REST API at http://localhost:8000")
+        print("Error: Could not connect to REST API at http://127.0.0.1:8000")
         print("Please make sure the REST API server is running:")
         print("cd rest_api && python app.py")
 
@@ -3,11 +3,16 @@ FastAPI GraphQL Server for Bookstore API
 Demonstrates modern GraphQL API with Strawberry and FastAPI
 """
 
+import asyncio
+import hashlib
 import uvicorn
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from strawberry.fastapi import GraphQLRouter
-from schema import schema
+from strawberry.http.exceptions import HTTPException as GraphQLHTTPException
+from typing import Dict
+from schema import get_context, schema
+from shared.queries import PERSISTED_QUERIES
 
 # Create FastAPI app
 app = FastAPI(
@@ -25,19 +30,106 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Automatic persisted queries: sha256 hex digest -> full query text. Clients
+# send only the hash. The example client's documents are preloaded at boot so
+# none of its requests miss; any other text is uploaded once, when missing.
+APQ_STORE: Dict[str, str] = {
+    hashlib.sha256(query.encode()).hexdigest(): query for query in PERSISTED_QUERIES
+}
+
+
+def resolve_persisted_query(data: dict) -> dict:
+    """Fill in the query text for a hash-only request, or register a new query"""
+    if not isinstance(data, dict):
+        raise GraphQLHTTPException(400, "Expected a JSON object")
+    extensions = data.get("extensions") or {}
+    if not isinstance(extensions, dict):
+        raise GraphQLHTTPException(400, "extensions must be an object")
+    persisted_query = extensions.get("persistedQuery")
+    if not persisted_query:
+        return data
+    if not isinstance(persisted_query, dict):
+        raise GraphQLHTTPException(400, "persistedQuery must be an object")
+
+    query_hash = persisted_query.get("sha256Hash")
+    query = data.get("query")
+    if query is None:
+        if query_hash not in APQ_STORE:
+            # Tells the client to retry with the full query text
+            raise GraphQLHTTPException(400, "PersistedQueryNotFound")
+        data["query"] = APQ_STORE[query_hash]
+    elif not isinstance(query, str):
+        raise GraphQLHTTPException(400, "query must be a string")
+    elif hashlib.sha256(query.encode()).hexdigest() == query_hash:
+        APQ_STORE[query_hash] = query
+    else:
+        raise GraphQLHTTPException(400, "provided sha does not match query")
+    return data
+
+
+class PersistedQueryRouter(GraphQLRouter):
+    """GraphQL router that accepts persisted query hashes in place of queries"""
+
+    def parse_json(self, data):
+        return resolve_persisted_query(super().parse_json(data))
+
+
 # Create GraphQL router
-graphql_app = GraphQLRouter(schema, graphiql=True)
+graphql_app = PersistedQueryRouter(schema, graphiql=True, context_getter=get_context)
 
 # Mount GraphQL endpoint
 app.include_router(graphql_app, prefix="/graphql")
 
 
+async def execute_operation(operation: dict, context: dict) -> dict:
+    """Run one GraphQL operation and shape it like a normal /graphql response"""
+    result = await schema.execute(
+        operation["query"],
+        variable_values=operation.get("variables"),
+        operation_name=operation.get("operationName"),
+        context_value=context,
+    )
+    response = {"data": result.data}
+    if result.errors:
+        response["errors"] = [error.formatted for error in result.errors]
+    return response
+
+
+@app.post("/graphql/batch")
+async def graphql_batch(request: Request):
+    """Run an array of operations sent in ONE request, answer with an array"""
+    try:
+        operations = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Body is not valid JSON")
+    if not isinstance(operations, list):
+        raise HTTPException(status_code=400, detail="Expected a JSON array")
+    if not all(isinstance(operation, dict) for operation in operations):
+        raise HTTPException(status_code=400, detail="Each operation must be an object")
+    try:
+        operations = [resolve_persisted_query(operation) for operation in operations]
+    except GraphQLHTTPException as e:
+        raise HTTPException(status_code=e.status_code, detail=e.reason)
+    for operation in operations:
+        if not isinstance(operation.get("query"), str):
+            raise HTTPException(status_code=400, detail="Each operation needs a query")
+        if not isinstance(operation.get("variables") or {}, dict):
+            raise HTTPException(status_code=400, detail="variables must be an object")
+
+    # The operations share one context, so their DataLoaders batch together
+    context = await get_context()
+    return await asyncio.gather(
+        *(execute_operation(operation, context) for operation in operations)
+    )
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information"""
     return {
         "message": "Bookstore GraphQL API",
         "graphql_endpoint": "/graphql",
+        "batch_endpoint": "/graphql/batch",
         "graphiql_ui": "/graphql (with GraphiQL interface)",
         "documentation": "/docs",
     }
@@ -55,4 +147,7 @@ if __name__ == "__main__":
     print("GraphiQL UI: http://localhost:8001/graphql")
     print("API documentation: http://localhost:8001/docs")
 
-    uvicorn.run("app:app", host="0.0.0.0", port=8001, reload=True, log_level="info")
+    # One process: the mock database and APQ_STORE live in process memory,
+    # so extra workers would each hold their own copy. uvicorn picks uvloop
+    # and httptools by itself when they are installed (uvicorn[standard]).
+    uvicorn.run("app:app", host="0.0.0.0", port=8001, log_level="info")
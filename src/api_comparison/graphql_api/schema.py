@@ -4,7 +4,10 @@ Demonstrates modern GraphQL patterns with type-safe resolvers
 """
 
 import strawberry
-from typing import List, Optional
+from strawberry.dataloader import DataLoader
+from strawberry.extensions import ParserCache, ValidationCache
+from strawberry.types import Info
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import sys
 import os
@@ -12,21 +15,66 @@ import os
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from shared.database import database
+from shared import models
+from shared.database import db as database
+
+
+# DataLoaders: every id requested while resolving one "level" of a query is
+# collected and fetched with a single bulk database call instead of one call
+# per object (the GraphQL N+1 problem)
+def _rows_in_key_order(rows: list, keys: List[int]) -> list:
+    """Line model instances up with the requested keys, None where one is missing"""
+    rows_by_id = {row.id: row for row in rows}
+    return [rows_by_id.get(key) for key in keys]
+
+
+async def load_authors(keys: List[int]) -> List[Optional[models.Author]]:
+    return _rows_in_key_order(database.get_authors_by_ids(keys), keys)
+
+
+async def load_books(keys: List[int]) -> List[Optional[models.Book]]:
+    return _rows_in_key_order(database.get_books_by_ids(keys), keys)
+
+
+async def load_customers(keys: List[int]) -> List[Optional[models.Customer]]:
+    return _rows_in_key_order(database.get_customers_by_ids(keys), keys)
+
+
+async def load_books_by_author(keys: List[int]) -> List[List[models.Book]]:
+    books_by_author: Dict[int, List[models.Book]] = {key: [] for key in keys}
+    for book in database.get_books_by_author_ids(keys):
+        books_by_author[book.author_id].append(book)
+    return [books_by_author[key] for key in keys]
+
+
+async def get_context() -> dict:
+    """Per-request context; loaders are created fresh so caches never leak"""
+    return {
+        "author_loader": DataLoader(load_fn=load_authors),
+        "book_loader": DataLoader(load_fn=load_books),
+        "customer_loader": DataLoader(load_fn=load_customers),
+        "books_by_author_loader": DataLoader(load_fn=load_books_by_author),
+    }
 
 
 @strawberry.type
 class Author:
     id: int
     name: str
-    email: str
+    email: Optional[str] = None
     bio: Optional[str] = None
-    created_at: datetime
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_row(cls, author: models.Author) -> "Author":
+        """Build from the shared model (email and created_at are not stored)"""
+        return cls(id=author.id, name=author.name, bio=author.bio)
 
     @strawberry.field
-    def books(self) -> List["Book"]:
+    async def books(self, info: Info) -> List["Book"]:
         """Get all books by this author"""
-        return [Book(**book) for book in database.get_books_by_author(self.id)]
+        books_data = await info.context["books_by_author_loader"].load(self.id)
+        return list(map(Book.from_row, books_data))
 
 
 @strawberry.type
@@ -40,11 +88,24 @@ class Book:
     genre: Optional[str] = None
     description: Optional[str] = None
 
+    @classmethod
+    def from_row(cls, book: models.Book) -> "Book":
+        """Build from the shared model (only the publication year is stored)"""
+        return cls(
+            id=book.id,
+            title=book.title,
+            isbn=book.isbn,
+            price=book.price,
+            publication_date=datetime(book.published_year, 1, 1),
+            author_id=book.author_id,
+            genre=book.genre,
+        )
+
     @strawberry.field
-    def author(self) -> Optional[Author]:
+    async def author(self, info: Info) -> Optional[Author]:
         """Get the author of this book"""
-        author_data = database.get_author(self.author_id)
-        return Author(**author_data) if author_data else None
+        author_data = await info.context["author_loader"].load(self.author_id)
+        return Author.from_row(author_data) if author_data else None
 
 
 @strawberry.type
@@ -56,10 +117,20 @@ class Customer:
     phone: Optional[str] = None
     created_at: datetime
 
+    @classmethod
+    def from_row(cls, customer: models.Customer) -> "Customer":
+        """Build from the shared model (address and phone are not stored)"""
+        return cls(
+            id=customer.id,
+            name=customer.name,
+            email=customer.email,
+            created_at=customer.registration_date,
+        )
+
     @strawberry.field
     def orders(self) -> List["Order"]:
         """Get all orders by this customer"""
-        return [Order(**order) for order in database.get_orders_by_customer(self.id)]
+        return list(map(Order.from_row, database.get_orders_by_customer(self.id)))
 
 
 @strawberry.type
@@ -68,11 +139,16 @@ class OrderItem:
     quantity: int
     price: float
 
+    @classmethod
+    def from_row(cls, book: models.Book) -> "OrderItem":
+        """Build from the ordered book; an order stores one id per copy"""
+        return cls(book_id=book.id, quantity=1, price=book.price)
+
     @strawberry.field
-    def book(self) -> Optional[Book]:
+    async def book(self, info: Info) -> Optional[Book]:
         """Get the book for this order item"""
-        book_data = database.get_book(self.book_id)
-        return Book(**book_data) if book_data else None
+        book_data = await info.context["book_loader"].load(self.book_id)
+        return Book.from_row(book_data) if book_data else None
 
 
 @strawberry.type
@@ -81,14 +157,31 @@ class Order:
     customer_id: int
     order_date: datetime
     total_amount: float
-    status: str
-    items: List[OrderItem]
+    status: Optional[str] = None
+    book_ids: strawberry.Private[Tuple[int, ...]]
+
+    @classmethod
+    def from_row(cls, order: models.Order) -> "Order":
+        """Build from the shared model (status is not stored)"""
+        return cls(
+            id=order.id,
+            customer_id=order.customer_id,
+            order_date=order.order_date,
+            total_amount=order.total_amount,
+            book_ids=order.book_ids,
+        )
+
+    @strawberry.field
+    async def items(self, info: Info) -> List[OrderItem]:
+        """Get the items of this order (its books, batched across orders)"""
+        books_data = await info.context["book_loader"].load_many(self.book_ids)
+        return [OrderItem.from_row(book) for book in books_data if book]
 
     @strawberry.field
-    def customer(self) -> Optional[Customer]:
+    async def customer(self, info: Info) -> Optional[Customer]:
         """Get the customer for this order"""
-        customer_data = database.get_customer(self.customer_id)
-        return Customer(**customer_data) if customer_data else None
+        customer_data = await info.context["customer_loader"].load(self.customer_id)
+        return Customer.from_row(customer_data) if customer_data else None
 
 
 # Input types for mutations
@@ -138,13 +231,13 @@ class Query:
         authors_data = database.get_all_authors()
         if limit:
             authors_data = authors_data[:limit]
-        return [Author(**author) for author in authors_data]
+        return list(map(Author.from_row, authors_data))
 
     @strawberry.field
     def author(self, id: int) -> Optional[Author]:
         """Get a specific author by ID"""
-        author_data = database.get_author(id)
-        return Author(**author_data) if author_data else None
+        author_data = database.get_author_by_id(id)
+        return Author.from_row(author_data) if author_data else None
 
     @strawberry.field
     def books(
@@ -154,26 +247,14 @@ class Query:
         genre: Optional[str] = None,
     ) -> List[Book]:
         """Get books with optional filters"""
-        if author_id:
-            books_data = database.get_books_by_author(author_id)
-        else:
-            books_data = database.get_all_books()
-
-        # Apply genre filter if specified
-        if genre:
-            books_data = [book for book in books_data if book.get("genre") == genre]
-
-        # Apply limit if specified
-        if limit:
-            books_data = books_data[:limit]
-
-        return [Book(**book) for book in books_data]
+        books_data = database.get_books(limit=limit, author_id=author_id, genre=genre)
+        return list(map(Book.from_row, books_data))
 
     @strawberry.field
     def book(self, id: int) -> Optional[Book]:
         """Get a specific book by ID"""
-        book_data = database.get_book(id)
-        return Book(**book_data) if book_data else None
+        book_data = database.get_book_by_id(id)
+        return Book.from_row(book_data) if book_data else None
 
     @strawberry.field
     def customers(self, limit: Optional[int] = None) -> List[Customer]:
@@ -181,61 +262,33 @@ class Query:
         customers_data = database.get_all_customers()
         if limit:
             customers_data = customers_data[:limit]
-        return [Customer(**customer) for customer in customers_data]
+        return list(map(Customer.from_row, customers_data))
 
     @strawberry.field
     def customer(self, id: int) -> Optional[Customer]:
         """Get a specific customer by ID"""
-        customer_data = database.get_customer(id)
-        return Customer(**customer_data) if customer_data else None
+        customer_data = database.get_customer_by_id(id)
+        return Customer.from_row(customer_data) if customer_data else None
 
     @strawberry.field
     def orders(
-        self,
-        limit: Optional[int] = None,
-        customer_id: Optional[int] = None,
-        status: Optional[str] = None,
+        self, limit: Optional[int] = None, customer_id: Optional[int] = None
     ) -> List[Order]:
-        """Get orders with optional filters"""
-        if customer_id:
-            orders_data = database.get_orders_by_customer(customer_id)
-        else:
-            orders_data = database.get_all_orders()
-
-        # Apply status filter if specified
-        if status:
-            orders_data = [
-                order for order in orders_data if order.get("status") == status
-            ]
-
-        # Apply limit if specified
-        if limit:
-            orders_data = orders_data[:limit]
-
-        return [Order(**order) for order in orders_data]
+        """Get orders with optional filters (stored orders have no status)"""
+        orders_data = database.get_orders(limit=limit, customer_id=customer_id)
+        return list(map(Order.from_row, orders_data))
 
     @strawberry.field
     def order(self, id: int) -> Optional[Order]:
         """Get a specific order by ID"""
-        order_data = database.get_order(id)
-        return Order(**order_data) if order_data else None
+        order_data = database.get_order_by_id(id)
+        return Order.from_row(order_data) if order_data else None
 
     @strawberry.field
     def search_books(self, query: str, limit: Optional[int] = 10) -> List[Book]:
-        """Search books by title or description"""
-        all_books = database.get_all_books()
-        matching_books = []
-
-        for book in all_books:
-            if query.lower() in book["title"].lower() or (
-                book.get("description") and query.lower() in book["description"].lower()
-            ):
-                matching_books.append(book)
-
-        if limit:
-            matching_books = matching_books[:limit]
-
-        return [Book(**book) for book in matching_books]
+        """Search books by title"""
+        books_data = database.search_books(query, limit)
+        return list(map(Book.from_row, books_data))
 
 
 # Mutation root
@@ -247,7 +300,7 @@ class Mutation:
         author_data = database.create_author(
             name=author_input.name, email=author_input.email, bio=author_input.bio
         )
-        return Author(**author_data)
+        return Author.from_row(author_data)
 
     @strawberry.mutation
     def update_author(self, id: int, author_input: AuthorInput) -> Optional[Author]:
@@ -258,7 +311,7 @@ class Mutation:
             email=author_input.email,
             bio=author_input.bio,
         )
-        return Author(**author_data) if author_data else None
+        return Author.from_row(author_data) if author_data else None
 
     @strawberry.mutation
     def delete_author(self, id: int) -> bool:
@@ -276,7 +329,7 @@ class Mutation:
             genre=book_input.genre,
             description=book_input.description,
         )
-        return Book(**book_data)
+        return Book.from_row(book_data)
 
     @strawberry.mutation
     def update_book(self, id: int, book_input: BookInput) -> Optional[Book]:
@@ -290,7 +343,7 @@ class Mutation:
             genre=book_input.genre,
             description=book_input.description,
         )
-        return Book(**book_data) if book_data else None
+        return Book.from_row(book_data) if book_data else None
 
     @strawberry.mutation
     def delete_book(self, id: int) -> bool:
@@ -306,7 +359,7 @@ class Mutation:
             address=customer_input.address,
             phone=customer_input.phone,
         )
-        return Customer(**customer_data)
+        return Customer.from_row(customer_data)
 
     @strawberry.mutation
     def update_customer(
@@ -320,7 +373,7 @@ class Mutation:
             address=customer_input.address,
             phone=customer_input.phone,
         )
-        return Customer(**customer_data) if customer_data else None
+        return Customer.from_row(customer_data) if customer_data else None
 
     @strawberry.mutation
     def delete_customer(self, id: int) -> bool:
@@ -339,13 +392,13 @@ class Mutation:
         order_data = database.create_order(
             customer_id=order_input.customer_id, items=items
         )
-        return Order(**order_data)
+        return Order.from_row(order_data)
 
     @strawberry.mutation
     def update_order_status(self, id: int, status: str) -> Optional[Order]:
         """Update order status"""
         order_data = database.update_order_status(id, status)
-        return Order(**order_data) if order_data else None
+        return Order.from_row(order_data) if order_data else None
 
     @strawberry.mutation
     def cancel_order(self, id: int) -> bool:
@@ -353,5 +406,10 @@ class Mutation:
         return database.update_order_status(id, "cancelled") is not None
 
 
-# Create the schema
-schema = strawberry.Schema(query=Query, mutation=Mutation)
+# Create the schema. Parsed documents and validation results are cached by
+# query text, so repeated (e.g. persisted) queries skip parse + validate.
+schema = strawberry.Schema(
+    query=Query,
+    mutation=Mutation,
+    extensions=[ParserCache(maxsize=512), ValidationCache(maxsize=512)],
+)
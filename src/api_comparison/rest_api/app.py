@@ -3,8 +3,11 @@ Flask REST API for the bookstore
 Demonstrates traditional REST API patterns
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, request
+from flask_compress import Compress
 from flask_cors import CORS
+import hashlib
+import orjson
 import sys
 import os
 
@@ -17,10 +20,71 @@ from shared.database import db
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Compress JSON responses large enough to benefit (list endpoints mostly)
+app.config["COMPRESS_MIMETYPES"] = ["application/json"]
+app.config["COMPRESS_LEVEL"] = 5
+app.config["COMPRESS_MIN_SIZE"] = 500
+Compress(app)
+
+
+def json_response(payload):
+    """Serialize a payload with orjson (faster than jsonify's stdlib json)
+
+    Model dataclasses can be passed as-is: orjson serializes them natively,
+    skipping the to_dict() step.
+    """
+    return Response(orjson.dumps(payload), mimetype="application/json")
+
+
+@app.after_request
+def add_etag(response):
+    """Tag successful GETs with a content hash; answer If-None-Match with 304"""
+    if request.method == "GET" and response.status_code == 200:
+        etag = hashlib.blake2b(response.get_data(), digest_size=8).hexdigest()
+        # Flask-Compress runs after this hook and turns a compressed response's
+        # tag into "<hash>:gzip", so that is what clients send back; match on
+        # the hash part and answer with the tag the client already holds
+        for client_tag in request.if_none_match.as_set():
+            if client_tag.partition(":")[0] == etag:
+                not_modified = Response(status=304)
+                not_modified.set_etag(client_tag)
+                not_modified.vary.add("Accept-Encoding")
+                return not_modified
+        response.set_etag(etag)
+    return response
+
+
+def serialize_book(book, include_author):
+    """Book dict, with its author merged in when include_author is set
+
+    Both to_dict() results are memoized on the model instances, so only the
+    merged dict is built per call.
+    """
+    author = db.get_author_for_book(book) if include_author else None
+    return book.to_dict(include_author=include_author, author=author)
+
+
+def parse_id_list(value):
+    """Parse a comma-separated id list such as "1,2,3" (raises ValueError)"""
+    return [int(item) for item in value.split(",")]
+
+
+def requested_fields():
+    """Field names from ?fields=title,price (None means every field)"""
+    fields = request.args.get("fields")
+    return [field for field in fields.split(",") if field] if fields else None
+
+
+def project(data, fields):
+    """Keep only the requested keys of a serialized record (sparse fieldsets)"""
+    if not fields:
+        return data
+    return {key: data[key] for key in fields if key in data}
+
 
 @app.route("/")
 def home():
-    return jsonify(
+    return json_response(
         {
             "message": "Bookstore REST API",
             "version": "1.0",
@@ -34,24 +98,48 @@ def home():
     )
 
 
+@app.route("/health")
+def health_check():
+    """Health check endpoint (probed by compare_apis.py)"""
+    return json_response({"status": "healthy", "api": "REST Bookstore API"})
+
+
 # Book endpoints
 @app.route("/api/books", methods=["GET"])
 def get_books():
-    """Get all books - returns ALL book data (over-fetching demo)"""
-    books = db.get_all_books()
+    """Get books (?ids=1,2,3 or ?author_id=&genre=&search=&limit= filters)
+
+    Returns ALL book data unless ?fields= narrows it
+    """
+    ids = request.args.get("ids")
+    if ids:
+        try:
+            books = db.get_books_by_ids(parse_id_list(ids))
+        except ValueError:
+            return json_response({"error": "ids must be comma-separated integers"}), 400
+    else:
+        try:
+            books = db.get_books(
+                limit=request.args.get("limit", type=int),
+                author_id=request.args.get("author_id", type=int),
+                genre=request.args.get("genre"),
+                search=request.args.get("search"),
+            )
+        except ValueError as e:
+            return json_response({"error": str(e)}), 400
 
     # Option to include author data (requires query parameter)
     include_author = request.args.get("include_author", "false").lower() == "true"
+    fields = requested_fields()
+    if not include_author and not fields:
+        return json_response(books)
 
     result = []
     for book in books:
-        if include_author:
-            author = db.get_author_for_book(book)
-            result.append(book.to_dict(include_author=True, author=author))
-        else:
-            result.append(book.to_dict())
+        book_dict = serialize_book(book, include_author)
+        result.append(project(book_dict, fields))
 
-    return jsonify(result)
+    return json_response(result)
 
 
 @app.route("/api/books/<int:book_id>", methods=["GET"])
@@ -59,15 +147,16 @@ def get_book(book_id):
     """Get single book by ID"""
     book = db.get_book_by_id(book_id)
     if not book:
-        return jsonify({"error": "Book not found"}), 404
+        return json_response({"error": "Book not found"}), 404
 
     include_author = request.args.get("include_author", "false").lower() == "true"
 
-    if include_author:
-        author = db.get_author_for_book(book)
-        return jsonify(book.to_dict(include_author=True, author=author))
+    fields = requested_fields()
+    if not include_author and not fields:
+        return json_response(book)
 
-    return jsonify(book.to_dict())
+    book_dict = serialize_book(book, include_author)
+    return json_response(project(book_dict, fields))
 
 
 @app.route("/api/books", methods=["POST"])
@@ -78,7 +167,7 @@ def create_book():
     required_fields = ["title", "author_id", "price", "genre", "published_year", "isbn"]
     for field in required_fields:
         if field not in data:
-            return jsonify({"error": f"Missing required field: {field}"}), 400
+            return json_response({"error": f"Missing required field: {field}"}), 400
 
     try:
         book = db.create_book(
@@ -89,24 +178,34 @@ def create_book():
             published_year=int(data["published_year"]),
             isbn=data["isbn"],
         )
-        return jsonify(book.to_dict()), 201
+        return json_response(book), 201
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return json_response({"error": str(e)}), 400
 
 
 @app.route("/api/books/by-genre/<genre>", methods=["GET"])
 def get_books_by_genre(genre):
     """Get books by genre"""
     books = db.get_books_by_genre(genre)
-    return jsonify([book.to_dict() for book in books])
+    return json_response(books)
 
 
 # Author endpoints
 @app.route("/api/authors", methods=["GET"])
 def get_authors():
-    """Get all authors"""
-    authors = db.get_all_authors()
-    return jsonify([author.to_dict() for author in authors])
+    """Get all authors, or only those listed in ?ids=1,2,3"""
+    ids = request.args.get("ids")
+    if ids:
+        try:
+            authors = db.get_authors_by_ids(parse_id_list(ids))
+        except ValueError:
+            return json_response({"error": "ids must be comma-separated integers"}), 400
+    else:
+        authors = db.get_all_authors()
+    fields = requested_fields()
+    if not fields:
+        return json_response(authors)
+    return json_response([project(author.to_dict(), fields) for author in authors])
 
 
 @app.route("/api/authors/<int:author_id>", methods=["GET"])
@@ -114,8 +213,11 @@ def get_author(author_id):
     """Get single author by ID"""
     author = db.get_author_by_id(author_id)
     if not author:
-        return jsonify({"error": "Author not found"}), 404
-    return jsonify(author.to_dict())
+        return json_response({"error": "Author not found"}), 404
+    fields = requested_fields()
+    if not fields:
+        return json_response(author)
+    return json_response(project(author.to_dict(), fields))
 
 
 @app.route("/api/authors/<int:author_id>/books", methods=["GET"])
@@ -123,10 +225,10 @@ def get_author_books(author_id):
     """Get all books by a specific author - requires separate endpoint"""
     author = db.get_author_by_id(author_id)
     if not author:
-        return jsonify({"error": "Author not found"}), 404
+        return json_response({"error": "Author not found"}), 404
 
     books = db.get_books_by_author(author_id)
-    return jsonify([book.to_dict() for book in books])
+    return json_response(books)
 
 
 # Customer endpoints
@@ -134,7 +236,7 @@ def get_author_books(author_id):
 def get_customers():
     """Get all customers"""
     customers = db.get_all_customers()
-    return jsonify([customer.to_dict() for customer in customers])
+    return json_response(customers)
 
 
 @app.route("/api/customers/<int:customer_id>", methods=["GET"])
@@ -142,8 +244,8 @@ def get_customer(customer_id):
     """Get single customer by ID"""
     customer = db.get_customer_by_id(customer_id)
     if not customer:
-        return jsonify({"error": "Customer not found"}), 404
-    return jsonify(customer.to_dict())
+        return json_response({"error": "Customer not found"}), 404
+    return json_response(customer)
 
 
 @app.route("/api/customers/<int:customer_id>/orders", methods=["GET"])
@@ -151,22 +253,21 @@ def get_customer_orders(customer_id):
     """Get all orders for a customer - separate endpoint needed"""
     customer = db.get_customer_by_id(customer_id)
     if not customer:
-        return jsonify({"error": "Customer not found"}), 404
+        return json_response({"error": "Customer not found"}), 404
 
     orders = db.get_orders_by_customer(customer_id)
 
     # Option to include book details
     include_books = request.args.get("include_books", "false").lower() == "true"
+    if not include_books:
+        return json_response(orders)
 
     result = []
     for order in orders:
-        if include_books:
-            books = db.get_books_for_order(order)
-            result.append(order.to_dict(include_books=True, books=books))
-        else:
-            result.append(order.to_dict())
+        books = db.get_books_for_order(order)
+        result.append(order.to_dict(include_books=True, books=books))
 
-    return jsonify(result)
+    return json_response(result)
 
 
 @app.route("/api/customers", methods=["POST"])
@@ -177,21 +278,27 @@ def create_customer():
     required_fields = ["name", "email"]
     for field in required_fields:
         if field not in data:
-            return jsonify({"error": f"Missing required field: {field}"}), 400
+            return json_response({"error": f"Missing required field: {field}"}), 400
 
     try:
         customer = db.create_customer(name=data["name"], email=data["email"])
-        return jsonify(customer.to_dict()), 201
+        return json_response(customer), 201
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return json_response({"error": str(e)}), 400
 
 
 # Order endpoints
 @app.route("/api/orders", methods=["GET"])
 def get_orders():
-    """Get all orders"""
-    orders = db.get_all_orders()
-    return jsonify([order.to_dict() for order in orders])
+    """Get all orders, or filter with ?customer_id= and ?limit="""
+    try:
+        orders = db.get_orders(
+            limit=request.args.get("limit", type=int),
+            customer_id=request.args.get("customer_id", type=int),
+        )
+    except ValueError as e:
+        return json_response({"error": str(e)}), 400
+    return json_response(orders)
 
 
 @app.route("/api/orders/<int:order_id>", methods=["GET"])
@@ -199,7 +306,7 @@ def get_order(order_id):
     """Get single order by ID"""
     order = db.get_order_by_id(order_id)
     if not order:
-        return jsonify({"error": "Order not found"}), 404
+        return json_response({"error": "Order not found"}), 404
 
     include_customer = request.args.get("include_customer", "false").lower() == "true"
     include_books = request.args.get("include_books", "false").lower() == "true"
@@ -207,7 +314,7 @@ def get_order(order_id):
     customer = db.get_customer_for_order(order) if include_customer else None
     books = db.get_books_for_order(order) if include_books else None
 
-    return jsonify(
+    return json_response(
         order.to_dict(
             include_customer=include_customer,
             include_books=include_books,
@@ -225,37 +332,37 @@ def create_order():
     required_fields = ["customer_id", "book_ids"]
     for field in required_fields:
         if field not in data:
-            return jsonify({"error": f"Missing required field: {field}"}), 400
+            return json_response({"error": f"Missing required field: {field}"}), 400
 
     # Validate customer exists
     customer = db.get_customer_by_id(data["customer_id"])
     if not customer:
-        return jsonify({"error": "Customer not found"}), 404
+        return json_response({"error": "Customer not found"}), 404
 
     # Validate all books exist
     for book_id in data["book_ids"]:
         book = db.get_book_by_id(book_id)
         if not book:
-            return jsonify({"error": f"Book with ID {book_id} not found"}), 404
+            return json_response({"error": f"Book with ID {book_id} not found"}), 404
 
     try:
         order = db.create_order(
             customer_id=data["customer_id"], book_ids=data["book_ids"]
         )
-        return jsonify(order.to_dict()), 201
+        return json_response(order), 201
     except Exception as e:
-        return jsonify({"error": str(e)}), 400
+        return json_response({"error": str(e)}), 400
 
 
 # Error handlers
 @app.errorhandler(404)
 def not_found(error):
-    return jsonify({"error": "Endpoint not found"}), 404
+    return json_response({"error": "Endpoint not found"}), 404
 
 
 @app.errorhandler(500)
 def internal_error(error):
-    return jsonify({"error": "Internal server error"}), 500
+    return json_response({"error": "Internal server error"}), 500
 
 
 if __name__ == "__main__":
@@ -268,5 +375,7 @@ if __name__ == "__main__":
     print("- GET  /api/customers/1/orders?include_books=true")
     print("- POST /api/books")
     print("- POST /api/orders")
+    print("\nDevelopment server only; for concurrent requests run:")
+    print("  gunicorn -k gevent -w 1 --worker-connections 1000 --keep-alive 30 app:app")
 
-    app.run(debug=True, port=5000)
+    app.run(port=5000)
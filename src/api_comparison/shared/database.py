@@ -1,13 +1,30 @@
 """
 Mock database for the bookstore API comparison
 This simulates a real database with in-memory data
+
+Lookups return the stored (frozen) instances themselves, never copies.
 """
 
+import re
+from collections import defaultdict
 from datetime import datetime
-from typing import List, Optional
+from itertools import count, islice
+from typing import Dict, List, Optional, Set
 from .models import Author, Book, Customer, Order
 
 
+def _check_limit(limit: Optional[int]) -> Optional[int]:
+    """Validate a result limit; None or 0 mean no limit (raises ValueError)"""
+    if limit is not None and limit < 0:
+        raise ValueError("limit must not be negative")
+    return limit or None
+
+
+def _tokenize(text: str) -> List[str]:
+    """Split lowercased text into the words used by the search index"""
+    return re.findall(r"\w+", text)
+
+
 class MockDatabase:
     def __init__(self):
         self._init_data()
@@ -99,52 +116,162 @@ class MockDatabase:
 
         # Orders
         self.orders = [
-            Order(1, 1, [1, 2], 62.98, datetime(2023, 6, 1)),
-            Order(2, 1, [3], 19.99, datetime(2023, 6, 15)),
-            Order(3, 2, [5, 8], 41.98, datetime(2023, 7, 3)),
-            Order(4, 3, [6, 7], 52.98, datetime(2023, 8, 12)),
-            Order(5, 4, [4, 9], 32.98, datetime(2023, 8, 20)),
+            Order(1, 1, (1, 2), 62.98, datetime(2023, 6, 1)),
+            Order(2, 1, (3,), 19.99, datetime(2023, 6, 15)),
+            Order(3, 2, (5, 8), 41.98, datetime(2023, 7, 3)),
+            Order(4, 3, (6, 7), 52.98, datetime(2023, 8, 12)),
+            Order(5, 4, (4, 9), 32.98, datetime(2023, 8, 20)),
         ]
 
+        # Next ids for new records; next() on a count is atomic under the GIL,
+        # so concurrent requests in this process never get the same id (the
+        # store is per-process, hence the single-worker servers)
+        self._next_book_id = count(max(book.id for book in self.books) + 1)
+        self._next_customer_id = count(
+            max(customer.id for customer in self.customers) + 1
+        )
+        self._next_order_id = count(max(order.id for order in self.orders) + 1)
+
+        # Primary-key indexes for O(1) lookups by id
+        self._authors_by_id = {author.id: author for author in self.authors}
+        self._books_by_id = {book.id: book for book in self.books}
+        self._customers_by_id = {customer.id: customer for customer in self.customers}
+        self._orders_by_id = {order.id: order for order in self.orders}
+
+        # Secondary indexes: equality filters return a pre-built bucket
+        self._books_by_author_id = defaultdict(list)
+        self._books_by_genre_lc = defaultdict(list)
+        for book in self.books:
+            self._books_by_author_id[book.author_id].append(book)
+            self._books_by_genre_lc[book.genre.lower()].append(book)
+        self._orders_by_customer_id = defaultdict(list)
+        for order in self.orders:
+            self._orders_by_customer_id[order.customer_id].append(order)
+
+        # Title search index: word -> ids of books whose title contains it,
+        # plus each lowercased title for phrase checks
+        self._title_index: Dict[str, Set[int]] = {}
+        self._titles_lc: Dict[int, str] = {}
+        for book in self.books:
+            self._index_book(book)
+
+    def _index_book(self, book: Book):
+        """Add a book's title words to the search index"""
+        title = book.title.lower()
+        self._titles_lc[book.id] = title
+        for token in _tokenize(title):
+            self._title_index.setdefault(token, set()).add(book.id)
+
     # Author methods
     def get_all_authors(self) -> List[Author]:
         return self.authors
 
     def get_author_by_id(self, author_id: int) -> Optional[Author]:
-        return next((author for author in self.authors if author.id == author_id), None)
+        return self._authors_by_id.get(author_id)
+
+    def get_authors_by_ids(self, author_ids: List[int]) -> List[Author]:
+        authors = (self.get_author_by_id(author_id) for author_id in author_ids)
+        return [author for author in authors if author]
 
     # Book methods
     def get_all_books(self) -> List[Book]:
         return self.books
 
     def get_book_by_id(self, book_id: int) -> Optional[Book]:
-        return next((book for book in self.books if book.id == book_id), None)
+        return self._books_by_id.get(book_id)
+
+    def get_books_by_ids(self, book_ids: List[int]) -> List[Book]:
+        books = (self.get_book_by_id(book_id) for book_id in book_ids)
+        return [book for book in books if book]
 
     def get_books_by_author(self, author_id: int) -> List[Book]:
-        return [book for book in self.books if book.author_id == author_id]
+        return self._books_by_author_id.get(author_id, [])
+
+    def get_books_by_author_ids(self, author_ids: List[int]) -> List[Book]:
+        return [
+            book
+            for author_id in dict.fromkeys(author_ids)
+            for book in self._books_by_author_id.get(author_id, [])
+        ]
 
     def get_books_by_genre(self, genre: str) -> List[Book]:
-        return [book for book in self.books if book.genre.lower() == genre.lower()]
+        return self._books_by_genre_lc.get(genre.lower(), [])
+
+    def get_books(
+        self,
+        limit: Optional[int] = None,
+        author_id: Optional[int] = None,
+        genre: Optional[str] = None,
+        search: Optional[str] = None,
+    ) -> List[Book]:
+        """Books matching every given filter, stopping once limit is reached"""
+        limit = _check_limit(limit)
+        if search:
+            books = iter(self.search_books(search))
+            if author_id:
+                books = (book for book in books if book.author_id == author_id)
+        elif author_id:
+            books = iter(self.get_books_by_author(author_id))
+        elif genre:
+            books = iter(self.get_books_by_genre(genre))
+        else:
+            books = iter(self.books)
+
+        if genre and (search or author_id):
+            genre = genre.lower()
+            books = (book for book in books if book.genre.lower() == genre)
+
+        return list(islice(books, limit))
+
+    def search_books(self, query: str, limit: Optional[int] = None) -> List[Book]:
+        """Books whose title contains every word of the query"""
+        limit = _check_limit(limit)
+        query = query.lower()
+        tokens = _tokenize(query)
+        if not tokens:
+            return []
+
+        book_ids = set.intersection(
+            *(self._title_index.get(token, set()) for token in tokens)
+        )
+        # Words can match out of order, so check multi-word phrases as a whole
+        if len(tokens) > 1:
+            book_ids = {i for i in book_ids if query in self._titles_lc[i]}
+
+        books = (self.get_book_by_id(book_id) for book_id in sorted(book_ids))
+        return list(islice(books, limit))
 
     # Customer methods
     def get_all_customers(self) -> List[Customer]:
         return self.customers
 
     def get_customer_by_id(self, customer_id: int) -> Optional[Customer]:
-        return next(
-            (customer for customer in self.customers if customer.id == customer_id),
-            None,
-        )
+        return self._customers_by_id.get(customer_id)
+
+    def get_customers_by_ids(self, customer_ids: List[int]) -> List[Customer]:
+        customers = (self.get_customer_by_id(cid) for cid in customer_ids)
+        return [customer for customer in customers if customer]
 
     # Order methods
     def get_all_orders(self) -> List[Order]:
         return self.orders
 
     def get_order_by_id(self, order_id: int) -> Optional[Order]:
-        return next((order for order in self.orders if order.id == order_id), None)
+        return self._orders_by_id.get(order_id)
 
     def get_orders_by_customer(self, customer_id: int) -> List[Order]:
-        return [order for order in self.orders if order.customer_id == customer_id]
+        return self._orders_by_customer_id.get(customer_id, [])
+
+    def get_orders(
+        self, limit: Optional[int] = None, customer_id: Optional[int] = None
+    ) -> List[Order]:
+        """Orders, optionally for one customer, at most limit of them"""
+        limit = _check_limit(limit)
+        if customer_id:
+            orders = self.get_orders_by_customer(customer_id)
+        else:
+            orders = self.orders
+        return orders[:limit]
 
     # Helper methods for related data
     def get_author_for_book(self, book: Book) -> Optional[Author]:
@@ -154,11 +281,7 @@ class MockDatabase:
         return self.get_customer_by_id(order.customer_id)
 
     def get_books_for_order(self, order: Order) -> List[Book]:
-        return [
-            self.get_book_by_id(book_id)
-            for book_id in order.book_ids
-            if self.get_book_by_id(book_id)
-        ]
+        return self.get_books_by_ids(order.book_ids)
 
     # Create new records (for POST examples)
     def create_book(
@@ -170,29 +293,37 @@ class MockDatabase:
         published_year: int,
         isbn: str,
     ) -> Book:
-        new_id = max(book.id for book in self.books) + 1
+        new_id = next(self._next_book_id)
         new_book = Book(new_id, title, author_id, price, genre, published_year, isbn)
         self.books.append(new_book)
+        self._books_by_id[new_id] = new_book
+        self._books_by_author_id[author_id].append(new_book)
+        self._books_by_genre_lc[genre.lower()].append(new_book)
+        self._index_book(new_book)
         return new_book
 
     def create_customer(self, name: str, email: str) -> Customer:
-        new_id = max(customer.id for customer in self.customers) + 1
+        new_id = next(self._next_customer_id)
         new_customer = Customer(new_id, name, email, datetime.now())
         self.customers.append(new_customer)
+        self._customers_by_id[new_id] = new_customer
         return new_customer
 
     def create_order(self, customer_id: int, book_ids: List[int]) -> Order:
-        new_id = max(order.id for order in self.orders) + 1
+        new_id = next(self._next_order_id)
 
-        # Calculate total amount
-        total = 0.0
-        for book_id in book_ids:
-            book = self.get_book_by_id(book_id)
-            if book:
-                total += book.price
+        # Calculate total amount (one index probe per id, unknown ids skipped)
+        prices = (
+            book.price
+            for book_id in book_ids
+            if (book := self._books_by_id.get(book_id))
+        )
+        total = sum(prices, 0.0)
 
-        new_order = Order(new_id, customer_id, book_ids, total, datetime.now())
+        new_order = Order(new_id, customer_id, tuple(book_ids), total, datetime.now())
         self.orders.append(new_order)
+        self._orders_by_id[new_id] = new_order
+        self._orders_by_customer_id[customer_id].append(new_order)
         return new_order
 
 
@@ -1,29 +1,43 @@
 """
 Shared data models for both REST and GraphQL APIs
+
+Instances are immutable and shared: the database hands out the same object
+to every caller (flyweight) instead of copies. to_dict() results are built
+once per instance and shared the same way, so treat them as read-only.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional
+from typing import Optional, Tuple
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Author:
     id: int
     name: str
     bio: str
     birth_year: int
+    _cached_dict: Optional[dict] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def to_dict(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "bio": self.bio,
-            "birth_year": self.birth_year,
-        }
-
-
-@dataclass
+        if self._cached_dict is None:
+            # Frozen: bypass the generated __setattr__ to fill the cache
+            object.__setattr__(
+                self,
+                "_cached_dict",
+                {
+                    "id": self.id,
+                    "name": self.name,
+                    "bio": self.bio,
+                    "birth_year": self.birth_year,
+                },
+            )
+        return self._cached_dict
+
+
+@dataclass(slots=True, frozen=True)
 class Book:
     id: int
     title: str
@@ -32,45 +46,72 @@ class Book:
     genre: str
     published_year: int
     isbn: str
+    _cached_dict: Optional[dict] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
     def to_dict(self, include_author=False, author=None):
-        result = {
-            "id": self.id,
-            "title": self.title,
-            "author_id": self.author_id,
-            "price": self.price,
-            "genre": self.genre,
-            "published_year": self.published_year,
-            "isbn": self.isbn,
-        }
+        if self._cached_dict is None:
+            object.__setattr__(
+                self,
+                "_cached_dict",
+                {
+                    "id": self.id,
+                    "title": self.title,
+                    "author_id": self.author_id,
+                    "price": self.price,
+                    "genre": self.genre,
+                    "published_year": self.published_year,
+                    "isbn": self.isbn,
+                },
+            )
+        # Only the base dict is cached; the author is merged in per call
         if include_author and author:
-            result["author"] = author.to_dict()
-        return result
+            return {**self._cached_dict, "author": author.to_dict()}
+        return self._cached_dict
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Customer:
     id: int
     name: str
     email: str
     registration_date: datetime
+    _iso_date: str = field(init=False, repr=False, compare=False)
+    _cached_dict: Optional[dict] = field(
+        default=None, init=False, repr=False, compare=False
+    )
 
-    def to_dict(self):
-        return {
-            "id": self.id,
-            "name": self.name,
-            "email": self.email,
-            "registration_date": self.registration_date.isoformat(),
-        }
+    def __post_init__(self):
+        # Dates never change, so format them once at construction
+        object.__setattr__(self, "_iso_date", self.registration_date.isoformat())
 
-
-@dataclass
+    def to_dict(self):
+        if self._cached_dict is None:
+            object.__setattr__(
+                self,
+                "_cached_dict",
+                {
+                    "id": self.id,
+                    "name": self.name,
+                    "email": self.email,
+                    "registration_date": self._iso_date,
+                },
+            )
+        return self._cached_dict
+
+
+@dataclass(slots=True, frozen=True)
 class Order:
     id: int
     customer_id: int
-    book_ids: List[int]
+    book_ids: Tuple[int, ...]
     total_amount: float
     order_date: datetime
+    _iso_date: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_iso_date", self.order_date.isoformat())
 
     def to_dict(
         self, include_customer=False, include_books=False, customer=None, books=None
@@ -80,7 +121,7 @@ class Order:
             "customer_id": self.customer_id,
             "book_ids": self.book_ids,
             "total_amount": self.total_amount,
-            "order_date": self.order_date.isoformat(),
+            "order_date": self._iso_date,
         }
 
         if include_customer and customer:
@@ -0,0 +1,93 @@
+"""
+GraphQL documents sent by the example client
+
+The GraphQL server preloads these into its persisted-query store at boot,
+so the client can send them by hash from the very first request.
+"""
+
+AUTHOR_BOOKS_QUERY = """
+query GetAuthorWithBooks($authorId: Int!) {
+    author(id: $authorId) {
+        id
+        name
+        email
+        bio
+        books {
+            id
+            title
+            price
+            genre
+            publicationDate
+        }
+    }
+}
+"""
+
+CUSTOMER_ORDERS_QUERY = """
+query GetCustomerOrderSummary($customerId: Int!) {
+    customer(id: $customerId) {
+        id
+        name
+        email
+        orders {
+            id
+            orderDate
+            totalAmount
+            status
+            items {
+                quantity
+                price
+                book {
+                    id
+                    title
+                    price
+                }
+            }
+        }
+    }
+}
+"""
+
+SEARCH_BOOKS_QUERY = """
+query SearchBooksWithAuthors($searchQuery: String!) {
+    searchBooks(query: $searchQuery, limit: 10) {
+        title
+        price
+        author {
+            name
+        }
+    }
+}
+"""
+
+# Both client views in one document: aliases let a single request return
+# the minimal (mobile) and rich (desktop) book lists side by side
+FLEXIBLE_BOOKS_QUERY = """
+query FlexibleBookLists {
+    mobile: books(limit: 5) {
+        id
+        title
+        price
+    }
+    desktop: books(limit: 5) {
+        id
+        title
+        price
+        genre
+        description
+        publicationDate
+        author {
+            name
+            bio
+        }
+    }
+}
+"""
+
+
+PERSISTED_QUERIES = (
+    AUTHOR_BOOKS_QUERY,
+    CUSTOMER_ORDERS_QUERY,
+    SEARCH_BOOKS_QUERY,
+    FLEXIBLE_BOOKS_QUERY,
+)
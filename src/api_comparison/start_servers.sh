@@ -13,29 +13,38 @@ if [ -f "requirements.txt" ]; then
 fi
 
 # Function to start a server in the background
+# Usage: start_server <dir> <port> <name> <command...>
 start_server() {
     local dir=$1
     local port=$2
     local name=$3
+    shift 3
     
     echo "Starting $name server on port $port..."
     cd "$dir"
-    python app.py &
+    "$@" &
     local pid=$!
     echo "$name server PID: $pid"
     cd ..
     return $pid
 }
 
-# Start REST API server
-start_server "rest_api" 8000 "REST"
+# Both servers run as ONE process: the mock database is in-process memory,
+# so each extra worker would get its own copy (writes made in one would be
+# invisible to the others, and their new ids would collide)
+
+# Start REST API server (gevent greenlets serve many requests concurrently)
+start_server "rest_api" 8000 "REST" \
+    gunicorn -k gevent -w 1 --worker-connections 1000 --keep-alive 30 \
+    -b 127.0.0.1:8000 app:app
 REST_PID=$!
 
 # Wait a moment for REST server to start
 sleep 2
 
-# Start GraphQL API server
-start_server "graphql_api" 8001 "GraphQL"
+# Start GraphQL API server (uses uvloop/httptools automatically if installed)
+start_server "graphql_api" 8001 "GraphQL" \
+    uvicorn app:app --host 0.0.0.0 --port 8001
 GRAPHQL_PID=$!
 
 # Wait a moment for GraphQL server to start
@@ -2,65 +2,240 @@
 """
 Demonstration of TCP vs UDP connections
 Shows the difference between connection-oriented and connectionless protocols
+
+Run with --quiet to skip the servers' per-packet output (e.g. when timing)
+Run with --workers N to only serve, from N processes sharing both ports
 """
 
+import asyncio
+import ctypes
+import ctypes.util
+import errno
+import functools
+import multiprocessing
+import os
 import socket
+import struct
+import sys
 import time
-import threading
 
+# SO_REUSEPORT lets several server processes bind the same port; the kernel
+# spreads connections and datagrams across them (Linux 3.9+, BSD, macOS).
+# Only the --workers mode sets it: anywhere else a stale server would bind
+# silently and take the demo's traffic.
+REUSE_PORT_SUPPORTED = hasattr(socket, "SO_REUSEPORT")
+
+# Per-packet narration from the servers; printing takes the stdout lock and
+# makes a write call per line, so it dominates a busy receive loop
+VERBOSE = True
+
+# Payloads are encoded once up front rather than per send
+ACK_MESSAGE = b"ACK: Message received"
+TCP_MESSAGES = [b"TCP Message %d" % n for n in range(1, 4)]
+UDP_PACKETS = [b"UDP Packet %d" % n for n in range(1, 4)]
+
+# Batched UDP receive: up to RECVMMSG_BATCH datagrams per system call
+RECVMMSG_BATCH = 32
+DATAGRAM_SIZE = 2048
+SOCKADDR_IN_SIZE = 16
+
+
+class IOVec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+
+class MsgHdr(ctypes.Structure):
+    _fields_ = [
+        ("msg_name", ctypes.c_void_p),
+        ("msg_namelen", ctypes.c_uint32),
+        ("msg_iov", ctypes.POINTER(IOVec)),
+        ("msg_iovlen", ctypes.c_size_t),
+        ("msg_control", ctypes.c_void_p),
+        ("msg_controllen", ctypes.c_size_t),
+        ("msg_flags", ctypes.c_int),
+    ]
+
+
+class MMsgHdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", MsgHdr), ("msg_len", ctypes.c_uint)]
+
+
+# recvmmsg(2) is Linux-only; elsewhere the UDP server uses recvfrom_into
+recvmmsg = None
+if sys.platform.startswith("linux"):
+    _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+    if hasattr(_libc, "recvmmsg"):
+        recvmmsg = _libc.recvmmsg
+        recvmmsg.argtypes = [
+            ctypes.c_int,
+            ctypes.POINTER(MMsgHdr),
+            ctypes.c_uint,
+            ctypes.c_int,
+            ctypes.c_void_p,
+        ]
+        recvmmsg.restype = ctypes.c_int
 
-def tcp_server():
-    """TCP Server - Connection-Oriented"""
-    print("=== TCP SERVER (Connection-Oriented) ===")
-    server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    server_socket.bind(("localhost", 8080))
-    server_socket.listen(1)
-    print("TCP Server listening on port 8080...")
 
-    while True:
-        # Wait for a connection
-        print("Waiting for client connection...")
-        client_socket, address = server_socket.accept()
+class TCPServerProtocol(asyncio.BufferedProtocol):
+    """Serve one TCP client: the connection is the session"""
+
+    def __init__(self):
+        # Allocated once per connection; the event loop receives straight
+        # into it (recv_into) instead of creating a bytes object per read
+        self.buffer = bytearray(4096)
+        self.buffer_view = memoryview(self.buffer)
+
+    def connection_made(self, transport):
+        self.transport = transport
+        address = transport.get_extra_info("peername")
         print(f"✅ CONNECTION ESTABLISHED with {address}")
         print("   → Server now maintains connection state")
         print("   → Both sides track the session")
 
+    def get_buffer(self, sizehint):
+        return self.buffer_view
+
+    def buffer_updated(self, nbytes):
+        self.transport.write(ACK_MESSAGE)
+        if VERBOSE:
+            print(f"📨 Received: {str(self.buffer_view[:nbytes], 'utf-8')}")
+            print("📤 Sent acknowledgment back")
+
+    def connection_lost(self, exc):
+        print("❌ CONNECTION CLOSED")
+        print("   → Server cleans up connection state")
+
+
+async def tcp_server(reuse_port=False):
+    """TCP Server - Connection-Oriented"""
+    print("=== TCP SERVER (Connection-Oriented) ===")
+    # One event loop multiplexes every connection; no thread per client.
+    # asyncio already sets TCP_NODELAY on accepted sockets and its writes
+    # always send the whole buffer.
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(
+        TCPServerProtocol,
+        "localhost",
+        8080,
+        reuse_address=True,
+        reuse_port=reuse_port or None,
+    )
+    print("TCP Server listening on port 8080...")
+    print("Waiting for client connection...")
+    return server
+
+
+class DatagramBatchReceiver:
+    """Receive many datagrams per system call with recvmmsg (Linux)"""
+
+    def __init__(self, server_socket):
+        self.fd = server_socket.fileno()
+
+        # One preallocated buffer, sliced into a DATAGRAM_SIZE slot per message
+        self.buffer = bytearray(RECVMMSG_BATCH * DATAGRAM_SIZE)
+        self.buffer_view = memoryview(self.buffer)
+        base = ctypes.addressof(
+            (ctypes.c_char * len(self.buffer)).from_buffer(self.buffer)
+        )
+        self.addresses = (ctypes.c_char * SOCKADDR_IN_SIZE * RECVMMSG_BATCH)()
+        self.iovecs = (IOVec * RECVMMSG_BATCH)()
+        self.messages = (MMsgHdr * RECVMMSG_BATCH)()
+
+        for i in range(RECVMMSG_BATCH):
+            self.iovecs[i].iov_base = base + i * DATAGRAM_SIZE
+            self.iovecs[i].iov_len = DATAGRAM_SIZE
+            header = self.messages[i].msg_hdr
+            header.msg_name = ctypes.addressof(self.addresses[i])
+            header.msg_iov = ctypes.pointer(self.iovecs[i])
+            header.msg_iovlen = 1
+
+    def receive(self):
+        """Return [(payload view, address)] for the datagrams waiting now"""
+        for message in self.messages:
+            message.msg_hdr.msg_namelen = SOCKADDR_IN_SIZE
+
+        count = recvmmsg(
+            self.fd, self.messages, RECVMMSG_BATCH, socket.MSG_DONTWAIT, None
+        )
+        if count < 0:
+            error = ctypes.get_errno()
+            if error in (errno.EAGAIN, errno.EWOULDBLOCK):
+                return []
+            raise OSError(error, os.strerror(error))
+
+        datagrams = []
+        for i in range(count):
+            start = i * DATAGRAM_SIZE
+            payload = self.buffer_view[start : start + self.messages[i].msg_len]
+            sockaddr = bytes(self.addresses[i])
+            port = struct.unpack("!H", sockaddr[2:4])[0]
+            datagrams.append((payload, (socket.inet_ntoa(sockaddr[4:8]), port)))
+        return datagrams
+
+
+def report_datagram(payload, address):
+    """Narrate one received datagram"""
+    if VERBOSE:
+        print(f"📨 Received packet from {address}: {str(payload, 'utf-8')}")
+        print("   → Each packet is independent")
+        print("   → No connection state to track")
+    # Note: We could send back, but it's optional in UDP
+
+
+def receive_one(server_socket, buffer):
+    """Return [(payload view, address)] for at most one waiting datagram"""
+    try:
+        nbytes, address = server_socket.recvfrom_into(buffer)
+    except BlockingIOError:
+        return []
+    return [(memoryview(buffer)[:nbytes], address)]
+
+
+async def receive_datagrams(server_socket):
+    """Handle each datagram on its own, reusing preallocated buffers"""
+    loop = asyncio.get_running_loop()
+
+    with server_socket:
+        buffer = bytearray(DATAGRAM_SIZE)
+        if recvmmsg is None and hasattr(loop, "sock_recvfrom_into"):
+            buffer_view = memoryview(buffer)
+            while True:
+                nbytes, address = await loop.sock_recvfrom_into(server_socket, buffer)
+                report_datagram(buffer_view[:nbytes], address)
+
+        if recvmmsg is not None:
+            receive = DatagramBatchReceiver(server_socket).receive
+        else:
+            # Python < 3.11 has no loop.sock_recvfrom_into: read one datagram
+            # per readiness wakeup instead
+            receive = functools.partial(receive_one, server_socket, buffer)
+
+        # Wait for readability, then drain what is queued (in batches on Linux)
+        readable = asyncio.Event()
+        loop.add_reader(server_socket.fileno(), readable.set)
         try:
             while True:
-                data = client_socket.recv(1024)
-                if not data:
-                    break
-                print(f"📨 Received: {data.decode()}")
-                client_socket.send(b"ACK: Message received")
-                print("📤 Sent acknowledgment back")
-        except:
-            pass
+                await readable.wait()
+                readable.clear()
+                for payload, address in receive():
+                    report_datagram(payload, address)
         finally:
-            print("❌ CONNECTION CLOSED")
-            print("   → Server cleans up connection state")
-            client_socket.close()
+            loop.remove_reader(server_socket.fileno())
 
 
-def udp_server():
+async def udp_server(reuse_port=False):
     """UDP Server - Connectionless"""
     print("\n=== UDP SERVER (Connectionless) ===")
     server_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    if reuse_port:
+        server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
     server_socket.bind(("localhost", 8081))
+    server_socket.setblocking(False)
     print("UDP Server listening on port 8081...")
     print("⚠️  NO CONNECTION ESTABLISHMENT NEEDED")
     print("   → Server just waits for individual packets")
     print("   → No session state maintained")
-
-    while True:
-        try:
-            data, address = server_socket.recvfrom(1024)
-            print(f"📨 Received packet from {address}: {data.decode()}")
-            print("   → Each packet is independent")
-            print("   → No connection state to track")
-            # Note: We could send back, but it's optional in UDP
-        except:
-            break
+    return asyncio.create_task(receive_datagrams(server_socket))
 
 
 def tcp_client():
@@ -71,15 +246,16 @@ def tcp_client():
     print("1. Attempting to connect to server...")
     try:
         client_socket.connect(("localhost", 8080))
+        # Send each small message at once instead of waiting to coalesce (Nagle)
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         print("2. ✅ CONNECTION ESTABLISHED!")
         print("   → Three-way handshake completed")
         print("   → Client maintains connection state")
 
         # Send some data
-        for i in range(3):
-            message = f"TCP Message {i+1}"
-            print(f"3. Sending: {message}")
-            client_socket.send(message.encode())
+        for message in TCP_MESSAGES:
+            print(f"3. Sending: {message.decode()}")
+            client_socket.sendall(message)
 
             response = client_socket.recv(1024)
             print(f"4. ✅ Received ACK: {response.decode()}")
@@ -96,16 +272,25 @@ def udp_client():
     """UDP Client - No connection needed"""
     print("\n=== UDP CLIENT ===")
     client_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    # connect() on UDP sends nothing: it just records the default peer, so
+    # the address is resolved and routed once instead of on every sendto
+    client_socket.connect(("localhost", 8081))
 
     print("⚠️  NO CONNECTION ESTABLISHMENT")
     print("   → Just create socket and send data")
     print("   → No handshake required")
 
     # Send some data
-    for i in range(3):
-        message = f"UDP Packet {i+1}"
-        print(f"📤 Sending packet: {message}")
-        client_socket.sendto(message.encode(), ("localhost", 8081))
+    for packet in UDP_PACKETS:
+        print(f"📤 Sending packet: {packet.decode()}")
+        try:
+            client_socket.send(packet)
+        except ConnectionRefusedError:
+            # A connected UDP socket reports the ICMP "port unreachable" an
+            # earlier packet triggered. Raising clears it, so just resend:
+            # UDP has no connection that could have been refused.
+            print("   → ICMP port unreachable for an earlier packet (no listener)")
+            client_socket.send(packet)
         print("   → Packet sent immediately")
         print("   → No acknowledgment expected")
         print("   → No connection state to maintain")
@@ -115,28 +300,29 @@ def udp_client():
     print("✅ Done sending packets")
 
 
-def demonstrate_difference():
+async def demonstrate_difference():
     """Show the key differences"""
     print("=" * 60)
     print("TCP vs UDP COMMUNICATION PATTERNS")
     print("=" * 60)
 
-    # Start servers in background
-    tcp_thread = threading.Thread(target=tcp_server, daemon=True)
-    udp_thread = threading.Thread(target=udp_server, daemon=True)
+    # Both servers run on this event loop; they are listening once awaited
+    tcp = await tcp_server()
+    udp = await udp_server()
 
-    tcp_thread.start()
-    udp_thread.start()
-
-    time.sleep(1)  # Let servers start
+    # The clients use plain blocking sockets, so run them in a worker thread
+    # to keep the event loop free to serve them
 
     # Demonstrate TCP
-    tcp_client()
+    await asyncio.to_thread(tcp_client)
 
-    time.sleep(1)
+    await asyncio.sleep(1)
 
     # Demonstrate UDP
-    udp_client()
+    await asyncio.to_thread(udp_client)
+
+    tcp.close()
+    udp.cancel()
 
     print("\n" + "=" * 60)
     print("KEY DIFFERENCES:")
@@ -158,5 +344,50 @@ def demonstrate_difference():
     print("  ❌ Packets can be lost/reordered")
 
 
+async def serve():
+    """Run both servers until interrupted, sharing their ports with siblings"""
+    tcp = await tcp_server(reuse_port=REUSE_PORT_SUPPORTED)
+    await udp_server(reuse_port=REUSE_PORT_SUPPORTED)
+    async with tcp:
+        await tcp.serve_forever()
+
+
+def serve_worker(verbose):
+    """Entry point of one server process"""
+    global VERBOSE
+    VERBOSE = verbose
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+def run_server_workers(workers):
+    """Serve from several processes; each has its own GIL and socket queues"""
+    if not REUSE_PORT_SUPPORTED:
+        print("SO_REUSEPORT is not available here; running a single server")
+        workers = 1
+
+    processes = [
+        multiprocessing.Process(target=serve_worker, args=(VERBOSE,))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    print(f"{workers} server processes sharing ports 8080 (TCP) and 8081 (UDP)")
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
 if __name__ == "__main__":
-    demonstrate_difference()
+    if "--quiet" in sys.argv[1:]:
+        VERBOSE = False
+    if "--workers" in sys.argv[1:]:
+        run_server_workers(int(sys.argv[sys.argv.index("--workers") + 1]))
+    else:
+        asyncio.run(demonstrate_difference())